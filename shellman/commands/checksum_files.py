@@ -1,15 +1,56 @@
 import hashlib
 import importlib.resources
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
 from pathlib import Path
+from typing import NamedTuple, Optional
 
 import click
 
+from shellman.parallel import ordered_map
+from shellman.walker import walk
+
+try:
+    import xxhash  # optional: fast non-cryptographic hashes
+except Exception:  # pragma: no cover
+    xxhash = None  # type: ignore
+
+READ_BUFFER_SIZE = 1024 * 1024
+CACHE_SUFFIX = ".cache.sqlite"
+CACHE_COMMIT_EVERY = 1000
+ECHO_BATCH_LINES = 512
+DUPLICATE_SAMPLE_SIZE = 64 * 1024
+MANIFEST_HEADER = "# shellman-checksums"
+BENCHMARK_BUFFER_SIZE = 8 * 1024 * 1024
+BENCHMARK_SECONDS = 0.5
+PARTIAL_SUFFIX = ".partial"
+CHECKPOINT_SUFFIX = ".checkpoint"
+CHECKPOINT_BATCH = 500
+CHECKPOINT_SECONDS = 5.0
+
+_thread_state = threading.local()
+
 SUPPORTED_ALGOS = {
     "sha256": hashlib.sha256,
     "md5": hashlib.md5,
     "sha1": hashlib.sha1,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
 }
 
+# Non-cryptographic algorithms: fast change detection, no tamper resistance.
+NON_CRYPTO_ALGOS = {}
+if xxhash is not None:
+    NON_CRYPTO_ALGOS = {
+        "xxh64": xxhash.xxh64,
+        "xxh128": xxhash.xxh3_128,
+    }
+    SUPPORTED_ALGOS.update(NON_CRYPTO_ALGOS)
+
 
 def print_help_md(lang="eng"):
     """Print localized help text for the `checksum_files` command."""
@@ -27,11 +68,21 @@ def print_help_md(lang="eng"):
 )
 @click.option("--path", "-p", "scan_path", type=click.Path(exists=True, file_okay=False), default=".", help="Directory to scan")
 @click.option("--ext", "-e", "ext_filter", help="Only include files with this extension")
-@click.option("--algo", "-a", type=click.Choice(["sha256", "md5", "sha1"]), default="sha256", help="Hash algorithm")
+@click.option("--algo", "-a", type=click.Choice(list(SUPPORTED_ALGOS)), default="sha256", help="Hash algorithm (xxh64/xxh128 require the optional 'xxhash' package)")
 @click.option("--out", "-o", "out_file", type=click.Path(), help="Output list file name")
 @click.option("--verify", "-v", is_flag=True, help="Verify instead of generate (reads --out list)")
+@click.option("--duplicates", "-D", is_flag=True, help="Find groups of identical files under --path instead of writing a list")
+@click.option("--paranoid", is_flag=True, help="With --verify: re-hash every file, ignoring the verification cache")
+@click.option("--failures-only", "-F", is_flag=True, help="With --verify: print only missing, mismatched or unreadable files")
+@click.option("--format", "-f", "manifest_format", type=click.Choice(["flat", "tree"]), default="flat", show_default=True, help="List format; 'tree' adds Merkle digests for every directory")
+@click.option("--diff", "diff_file", type=click.Path(exists=True, dir_okay=False), help="Compare the --out list against this newer list and print what changed")
+@click.option("--resume", "-r", is_flag=True, help="Continue an interrupted run from its .partial list instead of starting over")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=1, show_default=True, help="Number of files hashed in parallel")
+@click.option("--benchmark-algos", "benchmark", is_flag=True, help="Measure the throughput of every supported algorithm and exit")
 @click.option("--lang-help", "-lh", "lang", help="Show localized help (pl, eng) instead of executing the command")
-def cli(scan_path, ext_filter, algo, out_file, verify, lang):
+def cli(
+    scan_path, ext_filter, algo, out_file, verify, duplicates, paranoid, failures_only, manifest_format, diff_file, resume, jobs, benchmark, lang
+):
     """
     Command-line interface for generating or verifying file checksums.
 
@@ -42,10 +93,31 @@ def cli(scan_path, ext_filter, algo, out_file, verify, lang):
     Args:
         scan_path (str): Path to the directory to scan (default: ".").
         ext_filter (str | None): Restrict to files with this extension (without dot).
-        algo (str): Hashing algorithm to use ("sha256", "md5", "sha1").
+        algo (str): Hashing algorithm to use (see `SUPPORTED_ALGOS`). The
+            algorithm is recorded in the list header, and `--verify` uses the
+            header value when present.
         out_file (str | None): Path to the checksum output list file.
             Defaults to `checksums.{algo}sum` if not specified.
         verify (bool): If True, verify files against the list instead of generating it.
+            Files whose size, mtime and inode match the sidecar cache
+            (`<list>.cache.sqlite`) from a previous successful run are
+            confirmed without being read.
+        duplicates (bool): Report groups of identical files under `scan_path`
+            and the bytes that removing the extra copies would reclaim.
+        paranoid (bool): Ignore the verification cache and re-hash every file.
+        failures_only (bool): When verifying, print only entries that failed.
+        manifest_format (str): "flat" for plain `<hash>  <path>` lines, or
+            "tree" to also store a digest for every directory, computed from
+            the digests of its children (a Merkle tree).
+        diff_file (str | None): Newer checksum list to compare against the
+            `--out` list. Directory digests are compared first and only
+            subtrees that differ are descended into.
+        resume (bool): Skip files already recorded in `<out>.partial` by an
+            interrupted run and continue from its last checkpoint.
+        jobs (int): Number of worker threads hashing files concurrently.
+            Verification streams the list through the same bounded pool and
+            prints results in list order.
+        benchmark (bool): Print the in-memory throughput of each algorithm.
         lang (str | None): Show localized help ("pl" or "eng") instead of running.
 
     Raises:
@@ -57,16 +129,44 @@ def cli(scan_path, ext_filter, algo, out_file, verify, lang):
 
         Verify files against an existing checksum list:
             $ shellman checksum_files --verify -o myhashes.sha256
+
+        Force a full re-hash, ignoring the verification cache:
+            $ shellman checksum_files --verify --paranoid -o myhashes.sha256
+
+        Verify with 8 threads and report only failures:
+            $ shellman checksum_files --verify -j 8 -F -o myhashes.sha256
+
+        Find duplicate files in a build cache:
+            $ shellman checksum_files --duplicates -p ~/.cache/build -j 8
+
+        Write a tree list and later see what changed between two snapshots:
+            $ shellman checksum_files -p data -f tree -o monday.sha256
+            $ shellman checksum_files -o monday.sha256 --diff tuesday.sha256
+
+        Continue a run that was interrupted:
+            $ shellman checksum_files -p /archive -o archive.sha256 --resume
+
+        Compare algorithm speed on this machine:
+            $ shellman checksum_files --benchmark-algos
+
+        Hash a large tree with 8 worker threads:
+            $ shellman checksum_files -p /data -j 8 -o data.sha256
     """
     if lang:
         print_help_md(lang)
         return
 
+    if benchmark:
+        _benchmark_algos()
+        return
+
     scan_path = Path(scan_path)
     if not out_file:
         out_file = f"checksums.{algo}sum"
 
-    hash_func = SUPPORTED_ALGOS[algo]
+    if diff_file:
+        _report_manifest_diff(Path(out_file), Path(diff_file))
+        return
 
     if verify:
         out_path = Path(out_file)
@@ -74,63 +174,572 @@ def cli(scan_path, ext_filter, algo, out_file, verify, lang):
             click.echo(f"Checksum list {out_file} not found", err=True)
             raise click.Abort()
 
-        click.echo(f"🔎 Verifying files via {algo} list {out_file} ...")
-        success = True
-        with out_path.open("r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    expected, filename = line.strip().split(maxsplit=1)
-                    filename = filename.strip()
-                    file_path = Path(filename)
-                    if not file_path.is_file():
-                        click.echo(f"❌ {filename} not found")
-                        success = False
-                        continue
-                    actual = hash_file(file_path, hash_func)
-                    if actual != expected:
-                        click.echo(f"❌ MISMATCH: {filename}")
-                        success = False
-                    else:
-                        click.echo(f"✅ OK: {filename}")
-                except Exception as e:
-                    click.echo(f"Error verifying line: {line.strip()} → {e}")
-                    success = False
+        algo = _read_manifest_algo(out_path) or algo
+        if algo not in SUPPORTED_ALGOS:
+            raise click.ClickException(
+                f"Checksum list {out_file} uses '{algo}', which is not available. "
+                "Install the optional 'xxhash' package for xxh64/xxh128."
+            )
+        hash_func = SUPPORTED_ALGOS[algo]
 
+        click.echo(f"🔎 Verifying files via {algo} list {out_file} ...")
+        success = _verify_manifest(out_path, algo, hash_func, jobs=jobs, paranoid=paranoid, failures_only=failures_only)
         if not success:
             raise click.Abort()
         return
 
+    hash_func = SUPPORTED_ALGOS[algo]
+
+    if duplicates:
+        _report_duplicates(scan_path, ext_filter, hash_func, jobs)
+        return
+
     # Generate checksums
-    files = [
-        f
-        for f in scan_path.rglob("*")
-        if f.is_file() and (not ext_filter or f.suffix == f".{ext_filter}")
-    ]
+    files = sorted(
+        (entry for entry in walk(scan_path, with_stat=True) if not ext_filter or entry.suffix == f".{ext_filter}"),
+        key=lambda entry: entry.path,
+    )
 
     if not files:
         click.echo("No files matched.")
         return
 
-    click.echo(f"✍️  Writing {len(files)} checksums to {out_file} ...")
-    with open(out_file, "w", encoding="utf-8") as f:
-        for file in files:
-            checksum = hash_file(file, hash_func)
-            f.write(f"{checksum}  {file}\n")
+    tree_root = str(scan_path) if manifest_format == "tree" else None
+    _generate_manifest(files, Path(out_file), algo, hash_func, jobs=jobs, resume=resume, tree_root=tree_root)
+
+
+def _generate_manifest(files, out_path, algo, hash_func, *, jobs, resume, tree_root=None):
+    """
+    Hash `files` into a checksum list, checkpointing progress as it goes.
+
+    Entries are appended to `<out>.partial` in batches. After every batch the
+    file is fsynced and its byte offset recorded in `<out>.partial.checkpoint`,
+    so an interrupted run loses at most one batch. With `resume`, the partial
+    list is truncated to the last checkpoint and files already listed in it
+    are skipped. The finished list is renamed into place only when complete;
+    with `tree_root` set, directory digests are added at that point.
+    """
+    partial_path = out_path.with_name(out_path.name + PARTIAL_SUFFIX)
+    checkpoint_path = partial_path.with_name(partial_path.name + CHECKPOINT_SUFFIX)
 
+    done = _load_checkpoint(partial_path, checkpoint_path, algo) if resume else None
+    if done is None:
+        if resume:
+            click.echo("ℹ️  No usable checkpoint found, starting from scratch.")
+        with open(partial_path, "w", encoding="utf-8") as f:
+            f.write(f"{MANIFEST_HEADER} algo={algo}\n")
+        done = set()
+    else:
+        click.echo(f"⏩ Resuming: {len(done)} files already hashed.")
+        files = [entry for entry in files if entry.path not in done]
+
+    click.echo(f"✍️  Writing {len(files)} checksums to {out_path} ...")
+    total_bytes = 0
+    entries = len(done)
+    batch = []
+    last_checkpoint = time.monotonic()
+    started = time.perf_counter()
+    with open(partial_path, "a", encoding="utf-8") as f:
+
+        def commit_batch():
+            f.write("".join(batch))
+            f.flush()
+            os.fsync(f.fileno())
+            _write_checkpoint(checkpoint_path, algo, f.tell(), entries)
+            batch.clear()
+
+        try:
+            for entry, checksum in zip(files, ordered_map(lambda e: hash_file(e.path, hash_func), files, jobs)):
+                batch.append(f"{checksum}  {entry.path}\n")
+                entries += 1
+                total_bytes += entry.stat.st_size
+                if len(batch) >= CHECKPOINT_BATCH or time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                    commit_batch()
+                    last_checkpoint = time.monotonic()
+        except BaseException:
+            commit_batch()
+            click.echo(f"⚠️ Interrupted after {entries} files. Re-run with --resume to continue.", err=True)
+            raise
+        commit_batch()
+
+    if tree_root is not None:
+        _write_tree_manifest(partial_path, out_path, algo, hash_func, tree_root)
+        partial_path.unlink()
+    else:
+        os.replace(partial_path, out_path)
+    checkpoint_path.unlink(missing_ok=True)
     click.echo("✅ Done.")
+    _report_throughput(len(files), total_bytes, time.perf_counter() - started)
+
+
+def _write_checkpoint(checkpoint_path, algo, offset, entries):
+    """Atomically record how much of the partial list is durable."""
+    tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"algo": algo, "offset": offset, "entries": entries}), encoding="utf-8")
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _load_checkpoint(partial_path, checkpoint_path, algo):
+    """
+    Restore an interrupted run.
+
+    Truncates the partial list to the last checkpointed offset and returns the
+    set of paths it contains, or None if there is nothing usable to resume
+    (missing files, or a run made with a different algorithm).
+    """
+    if not partial_path.is_file() or not checkpoint_path.is_file():
+        return None
+    try:
+        checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("algo") != algo or _read_manifest_algo(partial_path) != algo:
+        return None
+
+    with open(partial_path, "r+b") as f:
+        f.truncate(checkpoint["offset"])
+
+    done = set()
+    with partial_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            parts = line.rstrip("\n").split(maxsplit=1)
+            if len(parts) == 2:
+                done.add(parts[1].strip())
+    return done
+
+
+def _read_manifest_header(out_path):
+    """Return the `key=value` fields of a checksum list header (empty for plain lists)."""
+    with out_path.open("r", encoding="utf-8") as f:
+        first_line = f.readline().strip()
+    if not first_line.startswith(MANIFEST_HEADER):
+        return {}
+    return dict(field.split("=", 1) for field in first_line[len(MANIFEST_HEADER):].split() if "=" in field)
+
+
+def _read_manifest_algo(out_path):
+    """Return the algorithm named in a checksum list header, or None for plain lists."""
+    return _read_manifest_header(out_path).get("algo")
+
+
+def _read_manifest_entries(out_path):
+    """
+    Load a checksum list into `(files, dirs)` dictionaries of path → digest.
+
+    Directory entries are the lines whose path ends with "/" (tree format).
+    """
+    files = {}
+    dirs = {}
+    with out_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(maxsplit=1)
+            if len(parts) != 2:
+                continue
+            digest, path = parts[0], parts[1].strip()
+            if path.endswith("/"):
+                dirs[path.rstrip("/") or "/"] = digest
+            else:
+                files[path] = digest
+    return files, dirs
+
+
+def _parent_dir(path):
+    """Return the parent directory of a list path ("." for top-level relative paths)."""
+    return os.path.dirname(path) or "."
+
+
+def _path_depth(path):
+    """Return how many parent steps lead from `path` to the top of its hierarchy."""
+    depth = 0
+    while (parent := _parent_dir(path)) != path:
+        path = parent
+        depth += 1
+    return depth
+
+
+def _merkle_digests(files, hash_func, root=None):
+    """
+    Compute a digest for every directory above the given files.
+
+    A directory digest hashes the sorted `(kind, digest, name)` records of its
+    direct children, so it changes if and only if something below it changed.
+    Ancestors are followed up to `root`, or to the top of the path when `root`
+    is None.
+    """
+    file_records = defaultdict(list)
+    for path, digest in files.items():
+        file_records[_parent_dir(path)].append((os.path.basename(path), "f", digest))
+
+    subdirs = defaultdict(list)
+    known = set(file_records)
+    pending = list(known)
+    while pending:
+        directory = pending.pop()
+        parent = _parent_dir(directory)
+        if directory == root or parent == directory:
+            continue
+        subdirs[parent].append(directory)
+        if parent not in known:
+            known.add(parent)
+            pending.append(parent)
+
+    dirs = {}
+    for directory in sorted(known, key=_path_depth, reverse=True):
+        records = file_records[directory] + [(os.path.basename(sub), "d", dirs[sub]) for sub in subdirs[directory]]
+        h = hash_func()
+        for name, kind, digest in sorted(records):
+            h.update(f"{kind} {digest} {name}\n".encode())
+        dirs[directory] = h.hexdigest()
+    return dirs
+
+
+def _write_tree_manifest(partial_path, out_path, algo, hash_func, root):
+    """Write the final tree-format list from a complete flat partial list."""
+    files, _ = _read_manifest_entries(partial_path)
+    dirs = _merkle_digests(files, hash_func, root=root)
+
+    records = [(path, f"{digest}  {path}") for path, digest in files.items()]
+    records.extend((path + os.sep, f"{digest}  {path.rstrip('/')}/") for path, digest in dirs.items())
+    records.sort()
+
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"{MANIFEST_HEADER} algo={algo} format=tree\n")
+        for _, line in records:
+            f.write(f"{line}\n")
+    os.replace(tmp_path, out_path)
+
+
+def diff_manifests(old_path, new_path):
+    """
+    Compare two checksum lists and return what changed between them.
+
+    Both lists are loaded, directory digests are taken from tree-format lists
+    (or computed when either list is flat), and the trees are compared top-down: a
+    directory whose digest matches on both sides is skipped without looking
+    at anything below it.
+
+    Args:
+        old_path (Path): Baseline checksum list.
+        new_path (Path): Newer checksum list.
+
+    Returns:
+        list[tuple[str, str]]: `(change, path)` pairs sorted by path, where
+        change is "added", "removed" or "modified". Directory paths end with "/".
+    """
+    old_algo = _read_manifest_algo(old_path) or "sha256"
+    new_algo = _read_manifest_algo(new_path) or "sha256"
+    if old_algo != new_algo:
+        raise click.ClickException(f"Cannot compare lists made with different algorithms ({old_algo} vs {new_algo}).")
+    hash_func = SUPPORTED_ALGOS.get(old_algo)
+    if hash_func is None:
+        raise click.ClickException(f"Algorithm '{old_algo}' is not available.")
+
+    loaded = [_read_manifest_entries(old_path), _read_manifest_entries(new_path)]
+    if not all(dirs for _, dirs in loaded):
+        # Stored directory digests are only comparable when both lists have them.
+        loaded = [(files, _merkle_digests(files, hash_func)) for files, _ in loaded]
+
+    sides = []
+    for files, dirs in loaded:
+        children = defaultdict(list)
+        for entry in (*files, *dirs):
+            parent = _parent_dir(entry)
+            if parent != entry:
+                children[parent].append(entry)
+        tops = [entry for entry in (*files, *dirs) if _parent_dir(entry) not in dirs or _parent_dir(entry) == entry]
+        sides.append((files, dirs, children, tops))
+
+    (old_files, old_dirs, old_children, old_tops), (new_files, new_dirs, new_children, new_tops) = sides
+
+    def label(path, dirs):
+        return f"{path.rstrip('/')}/" if path in dirs else path
+
+    changes = []
+    stack = sorted(set(old_tops) | set(new_tops))
+    while stack:
+        path = stack.pop()
+        old_digest = old_files.get(path) or old_dirs.get(path)
+        new_digest = new_files.get(path) or new_dirs.get(path)
+        if old_digest is None:
+            changes.append(("added", label(path, new_dirs)))
+        elif new_digest is None:
+            changes.append(("removed", label(path, old_dirs)))
+        elif (path in old_dirs) != (path in new_dirs):
+            changes.append(("removed", label(path, old_dirs)))
+            changes.append(("added", label(path, new_dirs)))
+        elif old_digest == new_digest:
+            continue
+        elif path in old_dirs:
+            stack.extend(set(old_children.get(path, ())) | set(new_children.get(path, ())))
+        else:
+            changes.append(("modified", path))
+
+    changes.sort(key=lambda change: change[1])
+    return changes
+
+
+def _report_manifest_diff(old_path, new_path):
+    """Print the differences between two checksum lists."""
+    if not old_path.is_file():
+        raise click.ClickException(f"Checksum list {old_path} not found")
+
+    click.echo(f"🔎 Comparing {old_path} → {new_path} ...")
+    changes = diff_manifests(old_path, new_path)
+    if not changes:
+        click.echo("✅ No differences.")
+        return
+
+    symbols = {"added": "+", "removed": "-", "modified": "~"}
+    for change, path in changes:
+        click.echo(f"{symbols[change]} {path}")
+
+    counts = {change: sum(1 for c, _ in changes if c == change) for change in symbols}
+    click.echo(f"📋 {counts['added']} added, {counts['removed']} removed, {counts['modified']} modified.")
+
+
+def _benchmark_algos():
+    """Measure in-memory hashing throughput of every supported algorithm."""
+    buffer = os.urandom(BENCHMARK_BUFFER_SIZE)
+    results = []
+    for name, hash_func in SUPPORTED_ALGOS.items():
+        h = hash_func()
+        processed = 0
+        started = time.perf_counter()
+        while (elapsed := time.perf_counter() - started) < BENCHMARK_SECONDS:
+            h.update(buffer)
+            processed += len(buffer)
+        results.append((processed / (1024 * 1024) / elapsed, name))
+
+    click.echo("⏱️  Hash throughput on this machine (single thread, in memory):")
+    for speed, name in sorted(results, reverse=True):
+        kind = "non-cryptographic" if name in NON_CRYPTO_ALGOS else "cryptographic"
+        click.echo(f"  {name:<8} {speed:>10.1f} MB/s  ({kind})")
+    if xxhash is None:
+        click.echo("ℹ️  Install the optional 'xxhash' package to enable xxh64/xxh128.")
+
+
+class _ManifestEntry(NamedTuple):
+    """One line of a checksum list, prepared for verification."""
+
+    line: str
+    filename: Optional[str] = None
+    expected: Optional[str] = None
+    stat: Optional[os.stat_result] = None
+    status: Optional[str] = None
+    detail: str = ""
 
 
-def hash_file(file_path, hash_func):
+def _verify_manifest(out_path, algo, hash_func, *, jobs, paranoid, failures_only):
+    """
+    Verify every entry of a checksum list and print the results in list order.
+
+    The list is streamed line by line: existence checks and cache lookups run
+    on the calling thread, hashing runs on a bounded thread pool, and results
+    are reordered back into list order before printing. Output is written in
+    batches to keep terminal I/O off the critical path.
+
+    Returns:
+        bool: True if every entry verified successfully.
+    """
+    counts = {"ok": 0, "cached": 0, "failed": 0}
+    pending_output = []
+
+    def flush_output():
+        if pending_output:
+            click.echo("\n".join(pending_output))
+            pending_output.clear()
+
+    cache = _VerifyCache(out_path.with_name(out_path.name + CACHE_SUFFIX))
+
+    def prepare(lines):
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith("#") or line.endswith("/"):
+                continue
+            try:
+                expected, filename = line.split(maxsplit=1)
+                filename = filename.strip()
+                file_path = Path(filename)
+                if not file_path.is_file():
+                    yield _ManifestEntry(line, filename, expected, status="missing")
+                    continue
+                st = file_path.stat()
+                if not paranoid and cache.is_verified(filename, algo, expected, st):
+                    yield _ManifestEntry(line, filename, expected, st, status="cached")
+                    continue
+                yield _ManifestEntry(line, filename, expected, st)
+            except Exception as e:
+                yield _ManifestEntry(line, status="error", detail=str(e))
+
+    def check(entry):
+        if entry.status is not None:
+            return entry
+        try:
+            actual = hash_file(Path(entry.filename), hash_func)
+        except Exception as e:
+            return entry._replace(status="error", detail=str(e))
+        return entry._replace(status="ok" if actual == entry.expected else "mismatch", detail=actual)
+
+    try:
+        with out_path.open("r", encoding="utf-8") as f:
+            for entry in ordered_map(check, prepare(f), jobs):
+                if entry.status in ("ok", "cached"):
+                    counts[entry.status] += 1
+                    if entry.status == "ok":
+                        cache.store(entry.filename, algo, entry.detail, entry.stat)
+                    if not failures_only:
+                        pending_output.append(f"✅ OK: {entry.filename}")
+                else:
+                    counts["failed"] += 1
+                    if entry.status == "missing":
+                        pending_output.append(f"❌ {entry.filename} not found")
+                    elif entry.status == "mismatch":
+                        pending_output.append(f"❌ MISMATCH: {entry.filename}")
+                    else:
+                        pending_output.append(f"Error verifying line: {entry.line} → {entry.detail}")
+                if len(pending_output) >= ECHO_BATCH_LINES:
+                    flush_output()
+    finally:
+        flush_output()
+        cache.close()
+
+    passed = counts["ok"] + counts["cached"]
+    if counts["cached"]:
+        click.echo(f"⚡ {counts['cached']} of {passed + counts['failed']} files confirmed from cache without re-reading.")
+    click.echo(f"📋 {passed} OK, {counts['failed']} failed.")
+    return counts["failed"] == 0
+
+
+def find_duplicates(root, hash_func, *, ext_filter=None, jobs=1):
+    """
+    Find groups of files with identical content under `root`.
+
+    Works in three narrowing stages so that most files are never read:
+    files are grouped by size in a single walker pass, size collisions
+    are split by a digest of their first and last `DUPLICATE_SAMPLE_SIZE`
+    bytes, and only files that still collide are hashed in full. Empty files
+    and additional hard links to an already seen inode are ignored.
+
+    Args:
+        root (Path): Directory to scan recursively.
+        hash_func (Callable[[], hashlib._Hash]): Hash constructor used for
+            both the sample and the full digests.
+        ext_filter (str | None): Restrict to files with this extension (without dot).
+        jobs (int): Number of worker threads used for hashing.
+
+    Returns:
+        list[tuple[int, list[str]]]: `(size, paths)` for every duplicate group,
+        largest reclaimable space first.
+    """
+    suffix = f".{ext_filter}" if ext_filter else None
+    by_size = defaultdict(list)
+    seen_inodes = set()
+    for entry in walk(root, with_stat=True):
+        if suffix and not entry.name.endswith(suffix):
+            continue
+        st = entry.stat
+        if st.st_size == 0 or (st.st_dev, st.st_ino) in seen_inodes:
+            continue
+        seen_inodes.add((st.st_dev, st.st_ino))
+        by_size[st.st_size].append(entry.path)
+
+    candidates = [(size, sorted(paths)) for size, paths in by_size.items() if len(paths) > 1]
+    groups = []
+    for size, paths in candidates:
+        sample_groups = _group_by(paths, lambda p, size=size: _hash_sample(p, size, hash_func), jobs)
+        for same_sample in sample_groups:
+            if size <= 2 * DUPLICATE_SAMPLE_SIZE:
+                # The sample already covered the whole file.
+                groups.append((size, same_sample))
+                continue
+            groups.extend((size, same) for same in _group_by(same_sample, lambda p: hash_file(p, hash_func), jobs))
+
+    groups.sort(key=lambda group: (-(group[0] * (len(group[1]) - 1)), group[1][0]))
+    return groups
+
+
+def _group_by(paths, key_func, jobs):
+    """Split `paths` by `key_func` and return the groups with more than one member."""
+    buckets = defaultdict(list)
+    for path, key in zip(paths, ordered_map(_safe_call(key_func), paths, jobs)):
+        if key is not None:
+            buckets[key].append(path)
+    return [group for group in buckets.values() if len(group) > 1]
+
+
+def _safe_call(func):
+    """Wrap `func` so that unreadable files yield None instead of raising."""
+    def wrapper(path):
+        try:
+            return func(path)
+        except OSError:
+            return None
+    return wrapper
+
+
+def _hash_sample(path, size, hash_func):
+    """Hash the head and tail of a file (or all of it when it is small)."""
+    h = hash_func()
+    with open(path, "rb") as f:
+        h.update(f.read(DUPLICATE_SAMPLE_SIZE))
+        if size > DUPLICATE_SAMPLE_SIZE:
+            f.seek(max(DUPLICATE_SAMPLE_SIZE, size - DUPLICATE_SAMPLE_SIZE))
+            h.update(f.read(DUPLICATE_SAMPLE_SIZE))
+    return h.hexdigest()
+
+
+def _report_duplicates(scan_path, ext_filter, hash_func, jobs):
+    """Print duplicate groups found under `scan_path` and the reclaimable total."""
+    click.echo(f"🔎 Looking for duplicate files in {scan_path} ...")
+    groups = find_duplicates(scan_path, hash_func, ext_filter=ext_filter, jobs=jobs)
+    if not groups:
+        click.echo("No duplicate files found.")
+        return
+
+    reclaimable = 0
+    for size, paths in groups:
+        group_reclaimable = size * (len(paths) - 1)
+        reclaimable += group_reclaimable
+        click.echo(
+            f"\n🔁 {len(paths)} copies × {_format_bytes(size)} (reclaimable: {_format_bytes(group_reclaimable)})"
+        )
+        for path in paths:
+            click.echo(f"  {path}")
+
+    click.echo(f"\n📦 {len(groups)} duplicate groups, {_format_bytes(reclaimable)} reclaimable.")
+
+
+def _format_bytes(size_bytes):
+    """Format a byte count as B, KB, MB or GB."""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.2f} KB"
+    if size_bytes < 1024 ** 3:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
+    return f"{size_bytes / 1024 ** 3:.2f} GB"
+
+
+def hash_file(file_path, hash_func, buffer_size=READ_BUFFER_SIZE):
     """
     Compute the checksum of a single file.
 
-    Reads the file in chunks to avoid memory issues with large files and
-    applies the given hashing function (e.g., SHA256, MD5, SHA1).
+    Reads the file in large chunks into a reusable per-thread buffer to avoid
+    memory issues with large files and applies the given hashing function
+    (e.g., SHA256, MD5, SHA1). hashlib releases the GIL for big buffers, so
+    several threads can hash different files concurrently.
 
     Args:
         file_path (Path): Path to the file to hash.
         hash_func (Callable[[], hashlib._Hash]): Hash constructor from hashlib
             (e.g., `hashlib.sha256`).
+        buffer_size (int): Size of the read buffer in bytes (default: 1 MiB).
 
     Returns:
         str: Hexadecimal digest of the computed checksum.
@@ -142,7 +751,80 @@ def hash_file(file_path, hash_func):
         '5d41402abc4b2a76b9719d911017c592'
     """
     h = hash_func()
-    with file_path.open("rb") as f:
-        while chunk := f.read(8192):
-            h.update(chunk)
+    view = memoryview(_read_buffer(buffer_size))
+    with open(file_path, "rb", buffering=0) as f:
+        while n := f.readinto(view):
+            h.update(view[:n])
     return h.hexdigest()
+
+
+def _read_buffer(size):
+    """Return a reusable per-thread read buffer of the given size."""
+    buf = getattr(_thread_state, "buffer", None)
+    if buf is None or len(buf) != size:
+        buf = bytearray(size)
+        _thread_state.buffer = buf
+    return buf
+
+
+class _VerifyCache:
+    """
+    Persistent SQLite sidecar remembering files that already passed verification.
+
+    Entries are keyed by path and validated against size, mtime_ns and inode,
+    so a file is only trusted while its stat data is exactly what it was when
+    its digest was last confirmed. If the database cannot be opened the cache
+    silently degrades to a no-op and every file is hashed.
+    """
+
+    def __init__(self, db_path):
+        self._pending = 0
+        try:
+            self._conn = sqlite3.connect(str(db_path))
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS verified ("
+                "path TEXT PRIMARY KEY, algo TEXT NOT NULL, digest TEXT NOT NULL, "
+                "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL)"
+            )
+        except sqlite3.Error:
+            self._conn = None
+
+    def is_verified(self, path, algo, digest, st):
+        """Return True if `path` was verified with this digest and its stat data is unchanged."""
+        if self._conn is None:
+            return False
+        row = self._conn.execute(
+            "SELECT algo, digest, size, mtime_ns, inode FROM verified WHERE path = ?", (path,)
+        ).fetchone()
+        return row == (algo, digest, st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def store(self, path, algo, digest, st):
+        """Record a successful verification of `path`."""
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO verified (path, algo, digest, size, mtime_ns, inode) VALUES (?, ?, ?, ?, ?, ?)",
+            (path, algo, digest, st.st_size, st.st_mtime_ns, st.st_ino),
+        )
+        self._pending += 1
+        if self._pending >= CACHE_COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        """Flush pending entries and close the database."""
+        if self._conn is None:
+            return
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+
+def _report_throughput(file_count, total_bytes, elapsed):
+    """Print hashing throughput in MB/s and files/s."""
+    elapsed = max(elapsed, 1e-9)
+    megabytes = total_bytes / (1024 * 1024)
+    click.echo(
+        f"📈 {file_count} files, {megabytes:.2f} MB in {elapsed:.2f}s "
+        f"({megabytes / elapsed:.2f} MB/s, {file_count / elapsed:.1f} files/s)"
+    )
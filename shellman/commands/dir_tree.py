@@ -1,13 +1,40 @@
 from __future__ import annotations
 
-import fnmatch
+import heapq
 import importlib.resources
-from collections.abc import Iterable
+import os
+import sqlite3
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional
 
 import click
 
+from shellman.dir_snapshot import diff_snapshot, snapshot_root, write_snapshot
+from shellman.gitignore import GitIgnore
+from shellman.walker import WalkEntry, compile_excludes, scan_dir
+
+SIZE_SCAN_WORKERS = 16
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def _parse_size(ctx, param, value: str | None) -> int:
+    """Click callback turning sizes such as "500", "10K", "1.5M" or "2G" into bytes."""
+    if value is None:
+        return 0
+    text = value.strip().upper()
+    if text.endswith("B"):
+        text = text[:-1]
+    multiplier = 1
+    if text and text[-1] in SIZE_UNITS:
+        multiplier = SIZE_UNITS[text[-1]]
+        text = text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        raise click.BadParameter(f"Invalid size: {value!r} (use e.g. 500, 10K, 1.5M, 2G)") from None
+
 
 @click.command(help="Print a visual directory tree.")
 @click.argument("path", default=".", type=click.Path(exists=True, file_okay=False))
@@ -24,6 +51,32 @@ import click
         "Can be used multiple times."
     ),
 )
+@click.option("--respect-gitignore", "-g", is_flag=True, help="Skip files and folders ignored by .gitignore")
+@click.option(
+    "--max-entries-per-dir",
+    "-m",
+    "max_entries",
+    type=click.IntRange(min=0),
+    help="Show at most N entries per folder and summarize the rest in one line",
+)
+@click.option("--sizes", "-s", is_flag=True, help="Show the total size and file count of every folder (like du)")
+@click.option(
+    "--sort",
+    "sort_by",
+    type=click.Choice(["name", "size"]),
+    default="name",
+    show_default=True,
+    help="Order entries by name or, largest first, by size (implies --sizes)",
+)
+@click.option("--min-size", callback=_parse_size, help="With --sizes: hide entries smaller than this, e.g. 10M")
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    help=f"List this many folders in parallel (useful on network drives)  [default: 1, or {SIZE_SCAN_WORKERS} with --sizes]",
+)
+@click.option("--snapshot", "snapshot_file", type=click.Path(dir_okay=False), help="Record every file and folder (size, mtime, inode) in a SQLite snapshot instead of printing the tree")
+@click.option("--diff", "diff_file", type=click.Path(exists=True, dir_okay=False), help="Report entries added, removed or modified since this snapshot")
 @click.option("--lang-help", "lang", help="Show localized help (pl, eng)")
 @click.option(
     "--ascii",
@@ -32,7 +85,7 @@ import click
     is_flag=True,
     help="Use ASCII instead of Unicode box lines",
 )
-def cli(path, files, depth, output, hidden, exclude, lang, use_ascii):
+def cli(path, files, depth, output, hidden, exclude, respect_gitignore, max_entries, sizes, sort_by, min_size, jobs, snapshot_file, diff_file, lang, use_ascii):
     """
     Print a visual tree of directories and optionally files.
     """
@@ -47,13 +100,37 @@ def cli(path, files, depth, output, hidden, exclude, lang, use_ascii):
     exclude_patterns = list(default_excludes) + list(exclude)
 
     root = Path(path).resolve()
-    tree = _build_tree(
+    if snapshot_file or diff_file:
+        if snapshot_file and diff_file:
+            raise click.UsageError("Use either --snapshot or --diff, not both.")
+        filters = {
+            "include_hidden": hidden,
+            "exclude": compile_excludes(exclude_patterns),
+            "gitignore": GitIgnore.for_root(root) if respect_gitignore else None,
+        }
+        if snapshot_file:
+            try:
+                count = write_snapshot(snapshot_file, root, **filters)
+            except sqlite3.Error as exc:
+                raise click.ClickException(f"Cannot write snapshot {snapshot_file}: {exc}") from exc
+            click.echo(f"📸 Snapshot of {count:,} entries in {root} saved to {snapshot_file}")
+        else:
+            _report_snapshot_diff(diff_file, root, filters)
+        return
+
+    tree_lines = _build_tree(
         root=root,
         include_files=files,
         max_depth=depth,
         show_hidden=hidden,
         ascii_mode=use_ascii,
         exclude_patterns=exclude_patterns,
+        respect_gitignore=respect_gitignore,
+        max_entries=max_entries,
+        sizes=sizes or sort_by == "size",
+        sort_by=sort_by,
+        min_size=min_size,
+        jobs=jobs,
     )
 
     if output:
@@ -61,92 +138,325 @@ def cli(path, files, depth, output, hidden, exclude, lang, use_ascii):
         if output_path.parent != Path("."):
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        output_path.write_text(tree, encoding="utf-8")
+        with output_path.open("w", encoding="utf-8") as f:
+            for index, line in enumerate(tree_lines):
+                f.write(line if not index else "\n" + line)
         click.echo(f"Saved to {output_path}")
         return
 
-    click.echo(tree)
+    stdout = click.get_text_stream("stdout")
+    flush_each = stdout.isatty()
+    for line in tree_lines:
+        stdout.write(line + "\n")
+        if flush_each:
+            stdout.flush()
+    stdout.flush()
 
 
 def _build_tree(
     *,
     root: Path,
     include_files: bool,
-    max_depth: Optional[int],
+    max_depth: int | None,
     show_hidden: bool,
     ascii_mode: bool,
     exclude_patterns: Iterable[str],
-) -> str:
-    """Build a directory tree representation."""
+    respect_gitignore: bool = False,
+    max_entries: int | None = None,
+    sizes: bool = False,
+    sort_by: str = "name",
+    min_size: int = 0,
+    jobs: int | None = None,
+) -> Iterator[str]:
+    """
+    Yield the lines of a directory tree representation as they are produced.
+
+    With `max_entries`, only the first N entries of each folder (in display
+    order) are shown, followed by a line counting the rest.
+
+    With `sizes`, the whole tree is measured first (whatever `max_depth` is),
+    every folder is annotated with its recursive size and file count, entries
+    smaller than `min_size` bytes are hidden and `sort_by="size"` lists the
+    largest entries first.
+
+    With `jobs > 1`, folders are listed on a thread pool ahead of rendering;
+    the output is identical. For `sizes`, `jobs` sets the size of the pool
+    that measures the tree, `SIZE_SCAN_WORKERS` if not given.
+    """
     if ascii_mode:
-        elbow = "+-- "
-        tee = "|-- "
-        pipe = "|   "
-        space = "    "
+        style = ("+-- ", "|-- ", "|   ", "    ", "...")
     else:
-        elbow = "└── "
-        tee = "├── "
-        pipe = "│   "
-        space = "    "
+        style = ("└── ", "├── ", "│   ", "    ", "…")
+
+    exclude = compile_excludes(exclude_patterns)
+    root_str = str(root)
+    root_entry = WalkEntry(root_str, root.name, 0, True, False)
+    root_ignore = GitIgnore.for_root(root) if respect_gitignore else None
+
+    def name_key(entry: WalkEntry) -> tuple[bool, str]:
+        return (not entry.is_dir, entry.name.lower())
+
+    def arrange(items: list, key) -> tuple[list, int]:
+        """Sort items for display; return the shown items and how many were left out."""
+        if max_entries is not None and len(items) > max_entries:
+            return heapq.nsmallest(max_entries, items, key=key), len(items) - max_entries
+        items.sort(key=key)
+        return items, 0
+
+    if not sizes:
+        jobs = jobs or 1
+        pool = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        window = jobs * 4
+        # Subfolders in the order rendering will open them, and listings
+        # already running for at most `window` of the first ones.
+        upcoming: deque[tuple[WalkEntry, GitIgnore | None]] = deque()
+        prefetched: dict[str, Future] = {}
+
+        def open_dir(entry: WalkEntry, parent_rules: GitIgnore | None):
+            rules = parent_rules
+            if rules is not None and entry.path != root_str:
+                rules = rules.for_directory(entry.path)
+            items = scan_dir(entry.path, include_hidden=show_hidden, exclude=exclude, gitignore=rules)
+            if not include_files:
+                items = [item for item in items if item.is_dir]
+            return items, rules
+
+        def expand(entry: WalkEntry, context: tuple[GitIgnore | None, int, tuple | None]):
+            # `context` holds the parent's gitignore rules, the level at which
+            # this entry's children would be expanded and the real paths of
+            # the folders opened on the way here, as a (path, parent) chain.
+            parent_rules, level, chain = context
+            if not entry.is_dir:
+                return None
+            if chain is None or entry.is_symlink:
+                real_path = os.path.realpath(entry.path)
+                # Symlinked folders are followed unless they lead back into a
+                # folder that is already open on this branch.
+                link = chain
+                while link is not None:
+                    if link[0] == real_path:
+                        return None
+                    link = link[1]
+            else:
+                real_path = os.path.join(chain[0], entry.name)
+            future = prefetched.pop(entry.path, None)
+            if future is None and upcoming and upcoming[0][0].path == entry.path:
+                upcoming.popleft()
+            items, rules = future.result() if future is not None else open_dir(entry, parent_rules)
+            shown, hidden = arrange(items, name_key)
+
+            if pool is not None:
+                if max_depth is None or level + 1 < max_depth:
+                    # Rendering is depth-first, so these subfolders are opened
+                    # before anything queued earlier.
+                    upcoming.extendleft(
+                        (item, rules) for item in reversed(shown) if item.is_dir and not item.is_symlink
+                    )
+                # List the next few folders ahead of rendering; output order is
+                # still decided by the sorted listing of each folder.
+                while upcoming and len(prefetched) < window:
+                    item, item_rules = upcoming.popleft()
+                    prefetched[item.path] = pool.submit(open_dir, item, item_rules)
+            return shown, hidden, (rules, level + 1, (real_path, chain))
+
+        def label(entry: WalkEntry) -> str:
+            return f"{entry.name}/" if entry.is_dir else entry.name
 
-    lines: list[str] = []
+        try:
+            yield from _render_tree(root_entry, (root_ignore, 0, None), expand=expand, label=label, style=style, max_depth=max_depth)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        return
 
-    def is_excluded(entry: Path) -> bool:
-        """Return True if entry matches any exclude pattern."""
-        name = entry.name
-        path_str = str(entry)
+    root_node = _measure_tree(
+        root_entry, include_hidden=show_hidden, exclude=exclude, gitignore=root_ignore, workers=jobs or SIZE_SCAN_WORKERS
+    )
 
-        for pattern in exclude_patterns:
-            if fnmatch.fnmatch(name, pattern):
-                return True
+    def sized_key(node: _SizedNode):
+        if sort_by == "size":
+            return (-node.size, node.entry.name.lower())
+        return name_key(node.entry)
 
-            if fnmatch.fnmatch(path_str, pattern):
-                return True
+    def expand_sized(node: _SizedNode, _context):
+        if node.children is None:
+            return None
+        items = [
+            child for child in node.children
+            if (include_files or child.entry.is_dir) and child.size >= min_size
+        ]
+        shown, hidden = arrange(items, sized_key)
+        return shown, hidden, None
 
-        return False
+    def sized_label(node: _SizedNode) -> str:
+        if node.entry.is_dir:
+            noun = "file" if node.files == 1 else "files"
+            return f"{node.entry.name}/  [{_format_bytes(node.size)}, {node.files:,} {noun}]"
+        return f"{node.entry.name}  [{_format_bytes(node.size)}]"
 
-    def list_entries(dir_path: Path) -> list[Path]:
-        """List directory entries with filters applied."""
-        try:
-            items = list(dir_path.iterdir())
-        except PermissionError:
-            return []
+    yield from _render_tree(root_node, None, expand=expand_sized, label=sized_label, style=style, max_depth=max_depth)
 
-        if not show_hidden:
-            items = [entry for entry in items if not entry.name.startswith(".")]
 
-        items = [entry for entry in items if not is_excluded(entry)]
+def _render_tree(root, root_context, *, expand, label, style, max_depth: int | None) -> Iterator[str]:
+    """
+    Render a tree top-down with an explicit stack, so depth is not limited by recursion.
 
-        if not include_files:
-            items = [entry for entry in items if entry.is_dir()]
+    `expand(item, context)` returns `(children, hidden_count, child_context)`
+    for an item that can be opened, or None; `context` is whatever the
+    parent's call returned (or `root_context`) and lets callers thread state
+    such as gitignore rules down the tree.
+    """
+    elbow, tee, pipe, space, ellipsis = style
+    yield label(root)
 
-        items.sort(key=lambda entry: (entry.is_file(), entry.name.lower()))
-        return items
+    if max_depth is not None and max_depth <= 0:
+        return
+    listing = expand(root, root_context)
+    if listing is None:
+        return
 
-    def walk(dir_path: Path, prefix: str, level: int) -> None:
-        """Walk through directories and append formatted tree lines."""
-        if max_depth is not None and level >= max_depth:
-            return
+    children, hidden, context = listing
+    # Each frame is one open directory: its remaining entries, their count,
+    # how many more were left out, the line prefix for its children, its
+    # level and the context its children are expanded with.
+    stack = [(enumerate(children), len(children), hidden, "", 0, context)]
+    while stack:
+        entries, count, hidden, prefix, level, context = stack[-1]
+        item = next(entries, None)
+        if item is None:
+            stack.pop()
+            if hidden:
+                yield f"{prefix}{elbow}{ellipsis} and {hidden:,} more"
+            continue
+
+        index, child = item
+        is_last = index == count - 1 and not hidden
+        yield f"{prefix}{elbow if is_last else tee}{label(child)}"
+
+        if max_depth is None or level + 1 < max_depth:
+            listing = expand(child, context)
+            if listing is not None:
+                grandchildren, child_hidden, child_context = listing
+                child_prefix = prefix + (space if is_last else pipe)
+                stack.append((enumerate(grandchildren), len(grandchildren), child_hidden, child_prefix, level + 1, child_context))
 
-        entries = list_entries(dir_path)
 
-        for index, entry in enumerate(entries):
-            is_last = index == len(entries) - 1
-            connector = elbow if is_last else tee
+class _SizedNode:
+    """A file or folder measured by `--sizes`; folders carry recursive totals."""
 
-            display_name = f"{entry.name}/" if entry.is_dir() else entry.name
-            lines.append(f"{prefix}{connector}{display_name}")
+    __slots__ = ("entry", "children", "size", "files", "counted")
+
+    def __init__(self, entry: WalkEntry) -> None:
+        self.entry = entry
+        opened = entry.is_dir and not entry.is_symlink
+        self.children: list[_SizedNode] | None = [] if opened else None
+        self.size = entry.stat.st_size if not opened and entry.stat is not None else 0
+        self.files = 0 if entry.is_dir else 1
+        # Bytes added to the parent's total; 0 for further links to a file already counted.
+        self.counted = self.size
 
-            if entry.is_dir():
-                child_prefix = prefix + (space if is_last else pipe)
-                walk(entry, child_prefix, level + 1)
 
-    lines.append(f"{root.name}/")
+def _measure_tree(
+    root: WalkEntry,
+    *,
+    include_hidden: bool,
+    exclude,
+    gitignore: GitIgnore | None,
+    workers: int = SIZE_SCAN_WORKERS,
+) -> _SizedNode:
+    """
+    List and stat the whole tree under `root` on a thread pool and total it bottom-up.
 
-    if max_depth is None or max_depth > 0:
-        walk(root, prefix="", level=0)
+    Folders are listed (and their files stat-ed) concurrently as they are
+    discovered; once every folder is listed, sizes and file counts are summed
+    from the deepest folders upwards in a single pass over the collected nodes.
 
-    return "\n".join(lines)
+    Like `du`, symlinks count as the link itself rather than their target and
+    a file with several hard links in the tree is counted once.
+    """
+    def scan(node: _SizedNode, rules: GitIgnore | None):
+        entries = scan_dir(node.entry.path, include_hidden=include_hidden, exclude=exclude, with_stat=True, gitignore=rules)
+        listed = []
+        for entry in entries:
+            if entry.is_symlink:
+                try:
+                    entry = entry._replace(stat=os.stat(entry.path, follow_symlinks=False))
+                except OSError:
+                    continue
+            listed.append((entry, rules.for_directory(entry.path) if rules is not None and entry.is_dir else None))
+        return listed
+
+    root_node = _SizedNode(root)
+    discovered = [root_node]
+    seen_inodes: dict[tuple[int, int], _SizedNode] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan, root_node, gitignore): root_node}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = pending.pop(future)
+                for entry, rules in future.result():
+                    child = _SizedNode(entry)
+                    node.children.append(child)
+                    st = entry.stat
+                    if child.children is None and st is not None:
+                        # Charge a hard-linked file to its first path, whatever
+                        # order the folders were listed in.
+                        first = seen_inodes.setdefault((st.st_dev, st.st_ino), child)
+                        if first is not child:
+                            if entry.path < first.entry.path:
+                                first, child = child, first
+                                seen_inodes[(st.st_dev, st.st_ino)] = first
+                            child.counted = 0
+                    if child.children is not None:
+                        discovered.append(child)
+                        pending[pool.submit(scan, child, rules)] = child
+
+    # Every folder is discovered after its parent, so walking the list
+    # backwards totals children before the folders that contain them.
+    for node in reversed(discovered):
+        node.size += sum(child.counted for child in node.children)
+        node.files += sum(child.files for child in node.children)
+        node.counted = node.size
+    return root_node
+
+
+def _format_bytes(size_bytes: int) -> str:
+    """Format a byte count as B, KB, MB or GB."""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.2f} KB"
+    if size_bytes < 1024 ** 3:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
+    return f"{size_bytes / 1024 ** 3:.2f} GB"
+
+
+def _report_snapshot_diff(snapshot_file: str, root: Path, filters: dict) -> None:
+    """Print the differences between a snapshot and the current tree."""
+    try:
+        recorded_root = snapshot_root(snapshot_file)
+    except sqlite3.Error as exc:
+        raise click.ClickException(f"Cannot read snapshot {snapshot_file}: {exc}") from exc
+    if recorded_root is None:
+        raise click.ClickException(f"Not a dir_tree snapshot: {snapshot_file}")
+    if recorded_root != str(root):
+        raise click.ClickException(f"Snapshot {snapshot_file} was taken of {recorded_root}, not {root}")
+
+    click.echo(f"🔎 Comparing {root} with snapshot {snapshot_file} ...")
+    symbols = {"added": "+", "removed": "-", "modified": "~"}
+    counts = dict.fromkeys(symbols, 0)
+    for change in diff_snapshot(snapshot_file, root, **filters):
+        counts[change.change] += 1
+        name = f"{change.path}/" if change.is_dir else change.path
+        if change.change == "modified" and change.old_size != change.new_size:
+            name += f"  ({_format_bytes(change.old_size)} → {_format_bytes(change.new_size)})"
+        click.echo(f"{symbols[change.change]} {name}")
+
+    if not any(counts.values()):
+        click.echo("✅ No differences.")
+        return
+    click.echo(f"📋 {counts['added']} added, {counts['removed']} removed, {counts['modified']} modified.")
 
 
 def _print_help_md(lang: str) -> None:
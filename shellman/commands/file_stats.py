@@ -1,10 +1,56 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import heapq
 import importlib.resources
+import io
+import json
 import os
+import sqlite3
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
 
-import chardet
 import click
+from chardet.universaldetector import UniversalDetector
+
+from shellman.parallel import ordered_map
+from shellman.walker import walk
+
+LINE_COUNT_BUFFER = 1024 * 1024
+# UTF-32 first: its little-endian BOM starts with the UTF-16 one.
+WIDE_TEXT_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# Bytes read per file for type and encoding detection: the whole file if it
+# is smaller, otherwise equal slices from its head, middle and tail.
+ENCODING_SAMPLE_SIZE = 192 * 1024
+HISTOGRAM_WIDTH = 40
+CACHE_MAX_ENTRIES = 1_000_000
+OUTPUT_FORMATS = ("text", "ndjson", "json", "csv")
+RECORD_FIELDS = ["path", "size", "lines", "extension", "created", "modified", "error"]
+META_FIELDS = ["type", "encoding"]
+CACHE_COMMIT_EVERY = 1000
+# A cache hit only rewrites its entry's last_seen once it is older than this.
+CACHE_TOUCH_INTERVAL = 24 * 3600
+
+
+class FileStats(NamedTuple):
+    """Everything `file_stats` reports about one file."""
+
+    path: Path
+    stat: os.stat_result
+    lines: int | str
+    ftype: str | None = None
+    encoding: str | None = None
 
 
 @click.command(
@@ -13,87 +59,491 @@ import click
 @click.argument("inputs", nargs=-1)
 @click.option("--ext", "-e", help="Only include files with this extension")
 @click.option("--meta", "-m", is_flag=True, help="Include file metadata (created, modified, type, encoding)")
+@click.option("--sample-bytes", type=click.IntRange(min=64), default=ENCODING_SAMPLE_SIZE, show_default=True, help="Bytes read per file to detect type and encoding with --meta (head, middle and tail of larger files)")
 @click.option("--output", "-o", is_flag=True, help="Save results to logs/file_stats_<timestamp>.log")
+@click.option("--respect-gitignore", "-g", is_flag=True, help="Skip files and folders ignored by .gitignore")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=1, show_default=True, help="List folders and analyze files with this many threads")
+@click.option("--summary", "-s", is_flag=True, help="Print totals per extension, a size histogram and the largest files instead of per-file blocks")
+@click.option("--top", "top_n", type=click.IntRange(min=0), default=10, show_default=True, help="Number of largest files listed by --summary")
+@click.option("--format", "-f", "output_format", type=click.Choice(OUTPUT_FORMATS), default="text", show_default=True, help="Per-file output: human-readable blocks, or ndjson/json/csv records with raw sizes and epoch timestamps")
+@click.option("--cache", "cache_file", type=click.Path(dir_okay=False), help="Reuse line counts, types and encodings of unchanged files from this SQLite cache")
+@click.option("--cache-max-entries", type=click.IntRange(min=1), default=CACHE_MAX_ENTRIES, show_default=True, help="Drop the least recently seen cache entries beyond this count")
+@click.option("--prune-cache", is_flag=True, help="With --cache: remove entries for files that no longer exist")
 @click.option("--lang-help", "-lh", "lang", help="Show localized help (pl, eng) instead of executing")
-def cli(inputs, ext, meta, output, lang):
+def cli(inputs, ext, meta, sample_bytes, output, respect_gitignore, jobs, summary, top_n, output_format, cache_file, cache_max_entries, prune_cache, lang):
     if lang:
         _print_help_md(lang)
         return
 
     if not inputs:
         raise click.UsageError("No files or directories provided.")
+    if summary and output_format != "text":
+        raise click.UsageError("--summary only supports --format text.")
+
+    files = iter_input_files(inputs, ext, respect_gitignore=respect_gitignore, jobs=jobs)
+    analyze_meta = meta and not summary
+
+    def with_cached(items, cache):
+        # Cache lookups stay on this thread; workers only analyze files.
+        for path, st in items:
+            yield path, st, cache.lookup(path, st)
+
+    def analyze(item):
+        # Returns the result and whether it came from the cache.
+        path, st, cached = item
+        if cached is not None and (not analyze_meta or cached.ftype is not None):
+            return cached, True
+        return analyze_file(path, st, meta=analyze_meta, sample_size=sample_bytes), False
+
+    totals = StatsSummary(top_n) if summary else None
+    file_count = 0
+    log_file = None
+    with ExitStack() as stack:
+        cache = StatsCache(cache_file) if cache_file else None
+        if cache is not None:
+            stack.callback(cache.close, max_entries=cache_max_entries)
+            if prune_cache:
+                removed = cache.prune()
+                click.echo(f"🧹 Removed {removed} vanished entries from {cache_file}", err=True)
+            files = with_cached(files, cache)
+            results = ordered_map(analyze, files, jobs)
+        else:
+            results = ordered_map(lambda item: (analyze_file(*item, meta=analyze_meta, sample_size=sample_bytes), False), files, jobs)
+        stdout = click.get_text_stream("stdout")
+        flush_each = stdout.isatty()
+        log_handle = None
+
+        def emit(text: str, end: str = "\n") -> None:
+            nonlocal log_handle, log_file
+            stdout.write(text + end)
+            if flush_each:
+                stdout.flush()
+            if output:
+                if log_handle is None:
+                    Path("logs").mkdir(exist_ok=True)
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    log_file = f"logs/file_stats_{timestamp}.log"
+                    log_handle = stack.enter_context(open(log_file, "w", encoding="utf-8"))
+                log_handle.write(text + end)
+
+        columns = RECORD_FIELDS + META_FIELDS if meta else RECORD_FIELDS
+        for stats, cached in results:
+            if cache is not None and not cached:
+                cache.store(stats)
+            if totals is not None:
+                totals.add(stats)
+            elif output_format == "text":
+                emit(format_block(stats, meta))
+            else:
+                record = stats_record(stats, meta)
+                if output_format == "ndjson":
+                    emit(json.dumps(record, ensure_ascii=False))
+                elif output_format == "json":
+                    emit(("[\n  " if not file_count else ",\n  ") + json.dumps(record, ensure_ascii=False), end="")
+                else:
+                    if not file_count:
+                        emit(_csv_row(columns))
+                    emit(_csv_row([record[column] for column in columns]))
+            file_count += 1
+
+        if totals is not None and file_count:
+            emit(totals.render())
+        if output_format == "json" and file_count:
+            emit("\n]")
+        stdout.flush()
+
+    if not file_count:
+        click.echo("No valid files found after filtering.", err=True)
+        raise click.Abort()
+
+    if log_file is not None:
+        click.echo(f"Results saved to {log_file}", err=output_format != "text")
+
 
-    all_files = []
+def iter_input_files(
+    inputs, ext: str | None, *, respect_gitignore: bool = False, jobs: int = 1
+) -> Iterator[tuple[Path, os.stat_result]]:
+    """
+    Yield `(path, stat)` for every file given directly or found under a given directory.
+
+    With `jobs > 1` directories are listed concurrently, so files within a
+    directory tree come in no fixed order.
+    """
     for input_path in inputs:
         path = Path(input_path)
         if path.is_file():
             if ext and path.suffix != f".{ext}":
                 continue
-            all_files.append(path.resolve())
+            yield path.resolve(), path.stat()
         elif path.is_dir():
-            all_files.extend(
-                file.resolve()
-                for file in path.rglob("*")
-                    if file.is_file() and (not ext or file.suffix == f".{ext}"))
+            for entry in walk(path.resolve(), with_stat=True, respect_gitignore=respect_gitignore, jobs=jobs):
+                if not ext or entry.suffix == f".{ext}":
+                    yield Path(entry.path), entry.stat
         else:
             click.echo(f"Invalid path: {input_path}", err=True)
 
-    if not all_files:
-        click.echo("No valid files found after filtering.", err=True)
-        raise click.Abort()
 
-    results = []
-    for file in all_files:
+def analyze_file(path: Path, st: os.stat_result, *, meta: bool = False, sample_size: int = ENCODING_SAMPLE_SIZE) -> FileStats:
+    """Count the lines of one file and, with `meta`, detect its type and encoding from `sample_size` bytes."""
+    try:
+        line_count: int | str = count_lines(path)
+    except Exception as e:
+        line_count = f"Error: {e}"
+
+    if not meta:
+        return FileStats(path, st, line_count)
+    ftype, encoding = detect_file_type_and_encoding(path, sample_size)
+    return FileStats(path, st, line_count, ftype, encoding)
+
+
+def format_block(stats: FileStats, meta: bool) -> str:
+    """Render the `==> file <==` block for one file."""
+    size_bytes = stats.stat.st_size
+    size_display = (
+        f"{size_bytes / 1024:.2f} KB" if size_bytes < 1024 * 1024
+        else f"{size_bytes / (1024 * 1024):.2f} MB"
+    )
+    lines = [
+        f"\n==> {stats.path} <==",
+        f"Lines     : {stats.lines}",
+        f"Size      : {size_display}",
+        f"Extension : {stats.path.suffix or ''}",
+    ]
+
+    if meta:
+        created = datetime.fromtimestamp(stats.stat.st_ctime).strftime("%Y-%m-%d %H:%M:%S")
+        modified = datetime.fromtimestamp(stats.stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(f"Created   : {created}")
+        lines.append(f"Modified  : {modified}")
+        lines.append(f"Type      : {stats.ftype}")
+        lines.append(f"Encoding  : {stats.encoding}")
+
+    return "\n".join(lines)
+
+
+def stats_record(stats: FileStats, meta: bool) -> dict:
+    """
+    Build the machine-readable record for one file.
+
+    Sizes are raw byte counts and times are POSIX timestamps. `lines` is None
+    and `error` is set when the file could not be read.
+    """
+    st = stats.stat
+    record = {
+        "path": str(stats.path),
+        "size": st.st_size,
+        "lines": stats.lines if isinstance(stats.lines, int) else None,
+        "extension": stats.path.suffix,
+        "created": st.st_ctime,
+        "modified": st.st_mtime,
+        "error": None if isinstance(stats.lines, int) else stats.lines,
+    }
+    if meta:
+        record["type"] = stats.ftype
+        record["encoding"] = stats.encoding
+    return record
+
+
+def _csv_row(values) -> str:
+    """Format one CSV row without its line terminator."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+class StatsCache:
+    """
+    Persistent SQLite cache of per-file results for `file_stats --cache`.
+
+    Entries are keyed by device and inode and are only reused while the
+    file's size and mtime_ns are exactly what they were when it was analyzed,
+    so repeat runs only re-read new or changed files. Each entry also records
+    its path (for `prune`) and when it was last seen (for the size cap). Only
+    misses are written; a hit just refreshes last_seen (and the path, if the
+    file was renamed) once it is older than `CACHE_TOUCH_INTERVAL`, in batched
+    updates, so a repeat run over an unchanged tree writes next to nothing. If
+    the database cannot be opened the cache silently degrades to a no-op.
+    """
+
+    def __init__(self, db_path: str | os.PathLike) -> None:
+        self._pending = 0
+        self._touched: list[tuple[int, str, int, int]] = []
+        self._now = int(time.time())
         try:
-            line_count = sum(1 for _ in file.open("r", encoding="utf-8", errors="ignore"))
-        except Exception as e:
-            line_count = f"Error: {e}"
-
-        size_bytes = os.path.getsize(file)
-        size_display = (
-            f"{size_bytes / 1024:.2f} KB" if size_bytes < 1024 * 1024
-            else f"{size_bytes / (1024 * 1024):.2f} MB"
+            self._conn: sqlite3.Connection | None = sqlite3.connect(os.fspath(db_path))
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stats ("
+                "dev INTEGER NOT NULL, inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "path TEXT NOT NULL, lines INTEGER NOT NULL, ftype TEXT, encoding TEXT, last_seen INTEGER NOT NULL, "
+                "PRIMARY KEY (dev, inode))"
+            )
+        except sqlite3.Error:
+            self._conn = None
+
+    def lookup(self, path: Path, st: os.stat_result) -> FileStats | None:
+        """Return the cached result for an unchanged file, or None."""
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, lines, ftype, encoding, path, last_seen FROM stats WHERE dev = ? AND inode = ?",
+            (st.st_dev, st.st_ino),
+        ).fetchone()
+        if row is None or row[:2] != (st.st_size, st.st_mtime_ns):
+            return None
+        if row[5] != str(path) or row[6] < self._now - CACHE_TOUCH_INTERVAL:
+            self._touched.append((self._now, str(path), st.st_dev, st.st_ino))
+            if len(self._touched) >= CACHE_COMMIT_EVERY:
+                self._flush_touched()
+        return FileStats(path, st, row[2], row[3], row[4])
+
+    def _flush_touched(self) -> None:
+        """Write the batched last_seen/path refreshes of cache hits."""
+        self._conn.executemany("UPDATE stats SET last_seen = ?, path = ? WHERE dev = ? AND inode = ?", self._touched)
+        self._conn.commit()
+        self._touched.clear()
+
+    def store(self, stats: FileStats) -> None:
+        """Record the result for a file that missed the cache; unreadable files are not cached."""
+        if self._conn is None or not isinstance(stats.lines, int):
+            return
+        st = stats.stat
+        self._conn.execute(
+            "INSERT OR REPLACE INTO stats (dev, inode, size, mtime_ns, path, lines, ftype, encoding, last_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, str(stats.path), stats.lines, stats.ftype, stats.encoding, self._now),
         )
-        file_ext = file.suffix or ""
-
-        results.append(f"\n==> {file} <==")
-        results.append(f"Lines     : {line_count}")
-        results.append(f"Size      : {size_display}")
-        results.append(f"Extension : {file_ext}")
-
-        if meta:
-            created = datetime.fromtimestamp(file.stat().st_ctime).strftime("%Y-%m-%d %H:%M:%S")
-            modified = datetime.fromtimestamp(file.stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S")
-            ftype, encoding = detect_file_type_and_encoding(file)
-            results.append(f"Created   : {created}")
-            results.append(f"Modified  : {modified}")
-            results.append(f"Type      : {ftype}")
-            results.append(f"Encoding  : {encoding}")
-
-    final_output = "\n".join(results)
-    click.echo(final_output)
-
-    if output:
-        Path("logs").mkdir(exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = f"logs/file_stats_{timestamp}.log"
-        Path(log_file).write_text(final_output, encoding="utf-8")
-        click.echo(f"Results saved to {log_file}")
-
-
-def detect_file_type_and_encoding(path: Path) -> tuple[str, str]:
+        self._pending += 1
+        if self._pending >= CACHE_COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+    def prune(self) -> int:
+        """Delete entries whose path no longer exists or now refers to another file; return how many."""
+        if self._conn is None:
+            return 0
+        vanished = []
+        for dev, inode, path in self._conn.execute("SELECT dev, inode, path FROM stats"):
+            try:
+                st = os.stat(path)
+            except OSError:
+                vanished.append((dev, inode))
+                continue
+            if (st.st_dev, st.st_ino) != (dev, inode):
+                vanished.append((dev, inode))
+        self._conn.executemany("DELETE FROM stats WHERE dev = ? AND inode = ?", vanished)
+        self._conn.commit()
+        return len(vanished)
+
+    def close(self, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        """Trim the cache to `max_entries`, dropping the least recently seen entries, and close it."""
+        if self._conn is None:
+            return
+        self._flush_touched()
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM stats").fetchone()
+        if count > max_entries:
+            self._conn.execute(
+                "DELETE FROM stats WHERE rowid IN (SELECT rowid FROM stats ORDER BY last_seen LIMIT ?)",
+                (count - max_entries,),
+            )
+        self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+
+class StatsSummary:
+    """
+    Running totals for `file_stats --summary`.
+
+    Memory is bounded by the number of distinct extensions and histogram
+    buckets plus a min-heap of the `top_n` largest files, however many files
+    are added.
+    """
+
+    def __init__(self, top_n: int = 10) -> None:
+        self.top_n = top_n
+        self.files = 0
+        self.bytes = 0
+        self.lines = 0
+        self.unreadable = 0
+        self.by_ext: dict[str, list[int]] = {}
+        # Bucket -1 holds empty files; bucket k holds sizes in [2**k, 2**(k+1)).
+        self.histogram: Counter[int] = Counter()
+        self._largest: list[tuple[int, str]] = []
+
+    def add(self, stats: FileStats) -> None:
+        size = stats.stat.st_size
+        lines = stats.lines if isinstance(stats.lines, int) else 0
+        if not isinstance(stats.lines, int):
+            self.unreadable += 1
+
+        self.files += 1
+        self.bytes += size
+        self.lines += lines
+
+        ext_totals = self.by_ext.setdefault(stats.path.suffix or "(none)", [0, 0, 0])
+        ext_totals[0] += 1
+        ext_totals[1] += size
+        ext_totals[2] += lines
+
+        self.histogram[size.bit_length() - 1] += 1
+
+        if self.top_n:
+            item = (size, str(stats.path))
+            if len(self._largest) < self.top_n:
+                heapq.heappush(self._largest, item)
+            elif item > self._largest[0]:
+                heapq.heapreplace(self._largest, item)
+
+    def render(self) -> str:
+        """Format the totals as the text printed by `--summary`."""
+        out = [f"\n📊 {self.files:,} files, {_format_bytes(self.bytes)}, {self.lines:,} lines"]
+        if self.unreadable:
+            out.append(f"⚠️ Lines not counted for {self.unreadable:,} unreadable files")
+
+        out.append("\nBy extension:")
+        ext_width = max(len(ext) for ext in self.by_ext)
+        for ext, (files, size, lines) in sorted(self.by_ext.items(), key=lambda item: (-item[1][1], item[0])):
+            out.append(f"  {ext:<{ext_width}}  {files:>10,} files  {_format_bytes(size):>10}  {lines:>14,} lines")
+
+        out.append("\nSize histogram:")
+        peak = max(self.histogram.values())
+        for bucket in sorted(self.histogram):
+            if bucket < 0:
+                label = "0 B"
+            else:
+                label = f"{_format_power_of_two(bucket)} – {_format_power_of_two(bucket + 1)}"
+            count = self.histogram[bucket]
+            bar = "█" * max(1, round(HISTOGRAM_WIDTH * count / peak))
+            out.append(f"  {label:>15}  {count:>10,}  {bar}")
+
+        if self._largest:
+            out.append(f"\nLargest {len(self._largest)} files:")
+            for size, path in sorted(self._largest, reverse=True):
+                out.append(f"  {_format_bytes(size):>10}  {path}")
+
+        return "\n".join(out)
+
+
+def _format_power_of_two(exponent: int) -> str:
+    """Format 2**exponent bytes exactly, e.g. "512 B", "4 KB", "2 GB"."""
+    units = ("B", "KB", "MB", "GB")
+    step = min(exponent // 10, len(units) - 1)
+    return f"{1 << (exponent - 10 * step)} {units[step]}"
+
+
+def _format_bytes(size_bytes: int) -> str:
+    """Format a byte count as B, KB, MB or GB."""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.2f} KB"
+    if size_bytes < 1024 ** 3:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
+    return f"{size_bytes / 1024 ** 3:.2f} GB"
+
+
+def count_lines(path: Path) -> int:
+    """
+    Count the lines of a file by counting newline bytes in large binary blocks.
+
+    A final line without a trailing newline is counted too. A file with no
+    "\n" at all is counted by its "\r" bytes instead, so classic Mac line
+    endings still count. Only files that start with a UTF-16/UTF-32 byte order
+    mark, where a newline is not a single byte, are decoded and counted line
+    by line.
+    """
+    with path.open("rb") as f:
+        head = f.read(4)
+        encoding = next((name for bom, name in WIDE_TEXT_BOMS if head.startswith(bom)), None)
+        if encoding is not None:
+            with path.open("r", encoding=encoding, errors="ignore") as text:
+                return sum(1 for _ in text)
+
+        f.seek(0)
+        buffer = bytearray(LINE_COUNT_BUFFER)
+        lines = 0
+        carriage_returns = 0
+        last_byte = None
+        while size := f.readinto(buffer):
+            lines += buffer.count(b"\n", 0, size)
+            if not lines:
+                carriage_returns += buffer.count(b"\r", 0, size)
+            last_byte = buffer[size - 1]
+
+    end = ord("\n")
+    if not lines and carriage_returns:
+        lines, end = carriage_returns, ord("\r")
+    if last_byte is not None and last_byte != end:
+        lines += 1
+    return lines
+
+
+def _read_sample(path: Path, budget: int) -> tuple[list[bytes], bool]:
+    """Read up to `budget` bytes of `path`; return the slices and whether they cover the whole file."""
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= budget:
+            return [f.read()], True
+
+        part = budget // 3
+        slices = [f.read(part)]
+        for offset in ((size - part) // 2, size - part):
+            f.seek(offset)
+            slices.append(f.read(part))
+        return slices, False
+
+
+def _is_utf8(slices: list[bytes], complete: bool) -> bool:
+    """Return True if every slice decodes as UTF-8, tolerating sequences cut at slice edges."""
+    for index, chunk in enumerate(slices):
+        if index:
+            # Skip continuation bytes of a character that started before the slice.
+            start = 0
+            while start < min(len(chunk), 3) and 0x80 <= chunk[start] <= 0xBF:
+                start += 1
+            chunk = chunk[start:]
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            decoder.decode(chunk, final=complete)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def detect_file_type_and_encoding(path: Path, sample_size: int = ENCODING_SAMPLE_SIZE) -> tuple[str, str]:
+    """
+    Classify a file as text or binary and guess its encoding from a bounded sample.
+
+    Byte order marks and NUL bytes are checked first, then plain ASCII and
+    UTF-8 are recognised by decoding the sample; only other content is passed
+    to chardet's incremental detector.
+    """
     try:
-        raw = path.read_bytes()
-        detected = chardet.detect(raw)
-        encoding = detected["encoding"] or "unknown"
-        confidence = detected["confidence"] or 0
-
-        if confidence > 0.8 and encoding.lower() in ("ascii", "utf-8"):
-            return ("Text", encoding)
-        elif b"\x00" in raw:
+        slices, complete = _read_sample(path, sample_size)
+        head = slices[0]
+        if not head:
+            return ("Text", "unknown")
+
+        if head.startswith(codecs.BOM_UTF8):
+            return ("Text", "UTF-8-SIG")
+        for bom, name in WIDE_TEXT_BOMS:
+            if head.startswith(bom):
+                return ("Text", name.upper())
+
+        if any(b"\x00" in chunk for chunk in slices):
             return ("Binary", "binary")
-        else:
-            return ("Text", encoding or "unknown")
+        if all(chunk.isascii() for chunk in slices):
+            return ("Text", "ascii")
+        if _is_utf8(slices, complete):
+            return ("Text", "utf-8")
+
+        detector = UniversalDetector()
+        for chunk in slices:
+            detector.feed(chunk)
+            if detector.done:
+                break
+        detected = detector.close()
+        return ("Text", detected["encoding"] or "unknown")
     except Exception:
         return ("unknown", "unknown")
 
@@ -1,9 +1,22 @@
+import heapq
 import importlib.resources
+import mmap
+import re
+import sqlite3
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 import click
 
+from shellman.file_index import build_index, index_root, query_index
+from shellman.walker import WalkEntry, walk
+
+CONTENT_CHUNK_SIZE = 1024 * 1024
+
 
 def print_help_md(lang: str = "eng") -> None:
     """Load and print help from markdown file."""
@@ -45,6 +58,176 @@ def format_file_size(size_bytes: int) -> str:
     return f"{size_bytes / (1024 * 1024):.2f} MB"
 
 
+def file_contains(
+    path: str,
+    needle: bytes,
+    *,
+    include_binary: bool = False,
+    chunk_size: int = CONTENT_CHUNK_SIZE,
+) -> bool:
+    """
+    Return True if the file contains `needle`, reading it in fixed-size chunks.
+
+    The last `len(needle) - 1` bytes of each chunk are carried over into the
+    next one, so matches spanning a chunk boundary are found while peak memory
+    stays bounded by `chunk_size` regardless of file size. Reading stops at the
+    first hit. Unless `include_binary` is set, files with a NUL byte in the
+    first chunk are treated as binary and skipped.
+    """
+    overlap = len(needle) - 1
+    tail = b""
+    first = True
+
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            if first:
+                if not include_binary and b"\x00" in chunk:
+                    return False
+                first = False
+
+            window = tail + chunk if tail else chunk
+            if needle in window:
+                return True
+
+            tail = window[-overlap:] if overlap > 0 else b""
+
+    return False
+
+
+class ContentMatcher:
+    """
+    Match many literal or regex patterns against a file in a single pass.
+
+    Every pattern is compiled on its own first, so an invalid one is reported
+    by itself. Patterns without capturing groups are then joined into one
+    non-capturing alternation (`finder`), which `re` can still optimize (for
+    example by a shared literal prefix); wrapping each pattern in a named
+    group would defeat that. At each hit, the remaining patterns are matched
+    at that position to see which of them - possibly several overlapping
+    ones - start there. When a hit only repeats patterns already found, the
+    finder is rebuilt without them, so a pattern occurring on every line
+    costs one rebuild instead of one Python step per occurrence. Patterns
+    with groups (and so possibly backreferences) would be renumbered inside
+    the alternation, and global inline flags such as `(?i)` are only allowed
+    at the start of a whole regex, so both kinds are searched separately.
+
+    Matching works on the raw bytes of the file, with patterns encoded as
+    UTF-8: literal non-ASCII text matches UTF-8 files, but a regex character
+    class such as `[ąę]` matches the individual bytes of those letters.
+    The file is memory-mapped, so peak memory does not depend on its size.
+    """
+
+    def __init__(self, patterns: list[str], *, regex: bool = False) -> None:
+        self.patterns = list(dict.fromkeys(patterns))
+        self._compiled: list[re.Pattern] = []
+        self._separate: list[int] = []
+        self._combined: list[int] = []
+        for index, pattern in enumerate(self.patterns):
+            source = pattern.encode("utf-8") if regex else re.escape(pattern.encode("utf-8"))
+            compiled = re.compile(source, re.MULTILINE)
+            self._compiled.append(compiled)
+            (self._separate if compiled.groups or not _can_nest(source) else self._combined).append(index)
+        try:
+            self.finder = self._build_finder(self._combined)
+        except re.error:
+            # Should a pattern still refuse to be combined, search all of them one by one.
+            self._separate = sorted(self._separate + self._combined)
+            self._combined = []
+            self.finder = None
+
+    def _build_finder(self, indexes: list[int]) -> re.Pattern | None:
+        """Compile one alternation of the given patterns, or None if there are none."""
+        if not indexes:
+            return None
+        return re.compile(b"|".join(b"(?:%s)" % self._compiled[index].pattern for index in indexes), re.MULTILINE)
+
+    def search(self, path: str, *, include_binary: bool = False) -> list[str]:
+        """Return the patterns found in the file, in the order they were given."""
+        with open(path, "rb") as f:
+            if not include_binary and b"\x00" in f.read(CONTENT_CHUNK_SIZE):
+                return []
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                return []
+
+        with data:
+            found = [index for index in self._separate if self._compiled[index].search(data)]
+
+            remaining = list(self._combined)
+            finder = self.finder
+            position = 0
+            while remaining:
+                hit = finder.search(data, position)
+                if hit is None:
+                    break
+                start = hit.start()
+                new = [index for index in remaining if self._compiled[index].match(data, start)]
+                if new:
+                    found.extend(new)
+                    remaining = [index for index in remaining if index not in new]
+                    position = start + 1
+                else:
+                    finder = self._build_finder(remaining)
+                    position = start
+
+        return [self.patterns[index] for index in sorted(found)]
+
+
+def _can_nest(source: bytes) -> bool:
+    """Return True if a regex still compiles inside `(?:...)`, i.e. has no global inline flags."""
+    try:
+        re.compile(b"(?:%s)" % source)
+    except re.error:
+        return False
+    return True
+
+
+def iter_matches(
+    entries: Iterable[WalkEntry],
+    predicate: Callable[[WalkEntry], Any],
+    jobs: int = 1,
+) -> Iterator[tuple[WalkEntry, Any]]:
+    """
+    Yield `(entry, result)` for every entry whose `predicate` result is truthy.
+
+    With `jobs > 1` the predicate runs on a thread pool while `entries` keeps
+    being consumed, so per-file I/O latency overlaps. At most `jobs * 4` checks
+    are in flight, and matches are yielded as soon as they are confirmed
+    (not in input order).
+    """
+    if jobs <= 1:
+        for entry in entries:
+            if result := predicate(entry):
+                yield entry, result
+        return
+
+    window = jobs * 4
+    pending: dict = {}
+
+    def collect(return_when: str) -> Iterator[tuple[WalkEntry, Any]]:
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            entry_done = pending.pop(future)
+            if result := future.result():
+                yield entry_done, result
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        try:
+            for entry in entries:
+                pending[pool.submit(predicate, entry)] = entry
+                if len(pending) >= window:
+                    yield from collect(FIRST_COMPLETED)
+
+            while pending:
+                yield from collect(FIRST_COMPLETED)
+        finally:
+            # Drop queued checks when the consumer stops early (e.g. --max-results).
+            for future in pending:
+                future.cancel()
+
+
 @click.command(help="Find files by name, extension or content with filtering options.")
 @click.argument(
     "search_path",
@@ -63,6 +246,40 @@ def format_file_size(size_bytes: int) -> str:
     "content_filter",
     help="Search for files containing this text",
 )
+@click.option(
+    "--content-file",
+    "-cf",
+    "content_file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Search for any of the patterns listed in this file (one per line)",
+)
+@click.option(
+    "--regex",
+    "-r",
+    "use_regex",
+    is_flag=True,
+    help="Treat --content / --content-file patterns as regular expressions",
+)
+@click.option(
+    "--include-binary",
+    "-b",
+    is_flag=True,
+    help="Also search file content of binary files (skipped by default)",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of folders listed and files searched in parallel",
+)
+@click.option(
+    "--sorted",
+    "sort_results",
+    is_flag=True,
+    help="Print results sorted by path",
+)
 @click.option(
     "--ext",
     "-e",
@@ -75,12 +292,43 @@ def format_file_size(size_bytes: int) -> str:
     is_flag=True,
     help="Save results to logs/find_files_<timestamp>.log",
 )
+@click.option(
+    "--max-results",
+    "-m",
+    type=click.IntRange(min=1),
+    help="Stop searching after this many results (with --sorted: print the first N by path)",
+)
+@click.option(
+    "--null",
+    "-0",
+    "null_separated",
+    is_flag=True,
+    help="Separate results with NUL instead of newline (bare paths, for xargs -0)",
+)
 @click.option(
     "--show-size",
     "-s",
     is_flag=True,
     help="Show file size next to each result",
 )
+@click.option(
+    "--respect-gitignore",
+    "-g",
+    is_flag=True,
+    help="Skip files and folders ignored by .gitignore",
+)
+@click.option(
+    "--build-index",
+    "build_index_file",
+    type=click.Path(dir_okay=False),
+    help="Build or refresh a file-name index of SEARCH_PATH in this file and exit",
+)
+@click.option(
+    "--index",
+    "index_file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Answer --name/--ext queries from an index instead of walking the tree",
+)
 @click.option(
     "--lang-help",
     "-lh",
@@ -91,67 +339,162 @@ def cli(
     search_path: str | None,
     name_filter: str | None,
     content_filter: str | None,
+    content_file: str | None,
+    use_regex: bool,
+    include_binary: bool,
+    jobs: int,
+    sort_results: bool,
     ext_filter: str | None,
     output: bool,
+    max_results: int | None,
+    null_separated: bool,
     show_size: bool,
+    respect_gitignore: bool,
+    build_index_file: str | None,
+    index_file: str | None,
     lang: str | None,
 ) -> None:
     if lang:
         print_help_md(lang)
         return
 
+    if index_file:
+        try:
+            indexed_root = index_root(index_file)
+        except sqlite3.Error as exc:
+            raise click.ClickException(f"Cannot read index {index_file}: {exc}") from exc
+        if indexed_root is None:
+            raise click.ClickException(f"Not a find_files index: {index_file}")
+        search_path = search_path or indexed_root
+
     if not search_path:
         raise click.UsageError("Missing required argument: SEARCH_PATH")
 
+    if build_index_file:
+        try:
+            stats = build_index(build_index_file, Path(search_path).resolve())
+        except sqlite3.Error as exc:
+            raise click.ClickException(f"Cannot write index {build_index_file}: {exc}") from exc
+        click.echo(
+            f"Indexed {stats.files} files in {stats.dirs} directories under {stats.root} "
+            f"({stats.rescanned} directories rescanned) → {build_index_file}"
+        )
+        return
+
     path = Path(search_path)
     if not path.is_dir():
         raise click.ClickException(f"Path is not a directory: {search_path}")
 
     normalized_ext = normalize_extension(ext_filter)
-    found_files: list[Path] = []
+    patterns = [content_filter] if content_filter else []
+    if content_file:
+        with open(content_file, encoding="utf-8") as f:
+            patterns.extend(line.rstrip("\r\n") for line in f if line.strip())
 
-    for file in path.rglob("*"):
-        if not file.is_file():
-            continue
+    needle = None
+    matcher = None
+    report_patterns = bool(content_file or use_regex)
+    if use_regex or len(patterns) > 1:
+        try:
+            matcher = ContentMatcher(patterns, regex=use_regex)
+        except re.error as exc:
+            from_option = content_filter is not None and exc.pattern == content_filter.encode("utf-8")
+            raise click.BadParameter(
+                f"Invalid regular expression {exc.pattern.decode('utf-8', 'replace')!r}: {exc}",
+                param_hint="--content" if from_option else "--content-file",
+            ) from exc
+    elif patterns:
+        needle = patterns[0].encode("utf-8")
 
-        if name_filter and name_filter not in file.name:
-            continue
+    def matches_name(entry: WalkEntry) -> bool:
+        if name_filter and name_filter not in entry.name:
+            return False
 
-        if normalized_ext and file.suffix != normalized_ext:
-            continue
+        return not normalized_ext or entry.suffix == normalized_ext
 
-        if content_filter:
-            try:
-                file_content = file.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                continue
+    def matches_content(entry: WalkEntry) -> list[str] | bool:
+        try:
+            if matcher is not None:
+                return matcher.search(entry.path, include_binary=include_binary)
+            return file_contains(entry.path, needle, include_binary=include_binary)
+        except OSError:
+            return False
 
-            if content_filter not in file_content:
-                continue
+    if index_file:
+        candidates = query_index(
+            index_file,
+            under=str(path.resolve()),
+            name_fragment=name_filter,
+            suffix=normalized_ext,
+        )
+    else:
+        candidates = walk(path.resolve(), with_stat=show_size, respect_gitignore=respect_gitignore, jobs=jobs)
 
-        found_files.append(file.resolve())
+    named = filter(matches_name, candidates)
+    if patterns:
+        matches: Iterable[tuple[WalkEntry, Any]] = iter_matches(named, matches_content, jobs)
+    else:
+        matches = ((entry, True) for entry in named)
 
-    if not found_files:
-        raise click.ClickException("No files found matching criteria.")
+    found_count = 0
+    with ExitStack() as stack:
+        stdout = click.get_text_stream("stdout")
+        flush_each = stdout.isatty()
+        terminator = "\0" if null_separated else "\n"
+        log_handle = None
+        log_file = None
 
-    results = []
-    for file in found_files:
-        if show_size:
-            size_display = format_file_size(file.stat().st_size)
-            results.append(f"{file}  [{size_display}]")
-        else:
-            results.append(str(file))
+        def emit(entry: WalkEntry, hits: Any) -> None:
+            nonlocal log_handle, log_file
+            line = entry.path
+            if not null_separated:
+                if show_size:
+                    line += f"  [{format_file_size(entry.stat.st_size)}]"
+                if report_patterns and hits:
+                    line += f"  ← {', '.join(hits)}"
 
-    final_output = "\n".join(results)
-    click.echo(final_output)
+            stdout.write(line + terminator)
+            if flush_each:
+                stdout.flush()
 
-    if output:
-        logs_dir = Path("logs")
-        logs_dir.mkdir(exist_ok=True)
+            if output:
+                if log_handle is None:
+                    logs_dir = Path("logs")
+                    logs_dir.mkdir(exist_ok=True)
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    log_file = logs_dir / f"find_files_{timestamp}.log"
+                    log_handle = stack.enter_context(open(log_file, "w", encoding="utf-8"))
+                log_handle.write(line + terminator)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = logs_dir / f"find_files_{timestamp}.log"
+        def counted(items: Iterable[tuple[WalkEntry, Any]]) -> Iterator[tuple[WalkEntry, Any]]:
+            nonlocal found_count
+            for item in items:
+                found_count += 1
+                yield item
+
+        buffered: list[tuple[WalkEntry, Any]] = []
+        try:
+            if sort_results and max_results is not None:
+                # Every result is needed to know which come first by path, but
+                # only the best `max_results` so far are kept.
+                buffered = heapq.nsmallest(max_results, counted(matches), key=lambda item: item[0].path)
+            elif sort_results:
+                buffered = sorted(counted(matches), key=lambda item: item[0].path)
+            else:
+                for entry, hits in counted(matches):
+                    emit(entry, hits)
+                    if max_results is not None and found_count >= max_results:
+                        break
+        finally:
+            if hasattr(matches, "close"):
+                matches.close()
+
+        for entry, hits in buffered:
+            emit(entry, hits)
+        stdout.flush()
+
+    if not found_count:
+        raise click.ClickException("No files found matching criteria.")
 
-        log_file.write_text(final_output, encoding="utf-8")
-        click.echo(f"Results saved to {log_file}")
-        
\ No newline at end of file
+    if log_file is not None:
+        click.echo(f"Results saved to {log_file}", err=null_separated)
@@ -28,12 +28,15 @@ Notes:
 
 from __future__ import annotations
 
+import os
 import zipfile
 from pathlib import Path
 from typing import Optional
 
 import click
 
+from shellman.walker import walk
+
 try:
     import pyzipper  # AES-capable zipfile fork
 except Exception:  # pragma: no cover
@@ -119,12 +122,11 @@ def _pack_with_zipfile(source: Path, archive_path: Path) -> None:
             return
 
         root = source
-        for path in root.rglob("*"):
-            if path.is_file():
-                # Keep top-level directory name inside the archive
-                rel = path.relative_to(root).as_posix()
-                arcname = f"{root.name}/{rel}"
-                zf.write(path, arcname=arcname)
+        for entry in walk(root):
+            # Keep top-level directory name inside the archive
+            rel = os.path.relpath(entry.path, root).replace(os.sep, "/")
+            arcname = f"{root.name}/{rel}"
+            zf.write(entry.path, arcname=arcname)
 
 
 def _pack_with_pyzipper(source: Path, archive_path: Path, password: str) -> None:
@@ -142,11 +144,10 @@ def _pack_with_pyzipper(source: Path, archive_path: Path, password: str) -> None
             return
 
         root = source
-        for path in root.rglob("*"):
-            if path.is_file():
-                rel = path.relative_to(root).as_posix()
-                arcname = f"{root.name}/{rel}"
-                zf.write(path, arcname=arcname)
+        for entry in walk(root):
+            rel = os.path.relpath(entry.path, root).replace(os.sep, "/")
+            arcname = f"{root.name}/{rel}"
+            zf.write(entry.path, arcname=arcname)
 
 
 # ================================= UNPACK ================================= #
@@ -0,0 +1,288 @@
+"""Shellman: directory snapshots and fast tree diffs
+
+Used by `dir_tree --snapshot` / `--diff`. A snapshot is a SQLite database with
+one row per file and folder under a root: its path relative to the root, kind,
+size, mtime and inode.
+
+Diffing walks the current tree against the snapshot. A folder whose mtime
+still matches the recorded one has had no entries added, removed or renamed,
+so it is not listed again: its recorded files are only stat-ed to catch
+in-place modifications and its recorded subfolders are visited the same way.
+Only folders whose mtime changed are re-listed.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from shellman.gitignore import GitIgnore
+from shellman.walker import WalkEntry, scan_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+"""
+
+# Entry kinds: a regular file, a folder, or a symlinked folder (never entered).
+FILE = "f"
+DIRECTORY = "d"
+LINKED_DIRECTORY = "l"
+
+
+class SnapshotChange(NamedTuple):
+    """One difference between a snapshot and the current tree."""
+
+    change: str  # "added", "removed" or "modified"
+    path: str  # relative to the root, "/"-separated
+    is_dir: bool
+    old_size: int | None = None
+    new_size: int | None = None
+
+
+class _Filters(NamedTuple):
+    include_hidden: bool
+    exclude: re.Pattern | None
+
+
+def _connect(db_path: str | os.PathLike) -> sqlite3.Connection:
+    """Open a snapshot for writing, creating its tables; refuse unrelated databases."""
+    conn = sqlite3.connect(os.fspath(db_path))
+    try:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if tables and "entries" not in tables:
+            raise sqlite3.DatabaseError(f"not a dir_tree snapshot: {os.fspath(db_path)}")
+        conn.executescript(SCHEMA)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def _connect_readonly(db_path: str | os.PathLike) -> sqlite3.Connection:
+    """Open an existing snapshot without creating or modifying anything."""
+    uri = Path(os.path.abspath(os.fspath(db_path))).as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+def snapshot_root(db_path: str | os.PathLike) -> str | None:
+    """
+    Return the absolute directory a snapshot was taken of, or None if the file is not a snapshot.
+
+    Raises:
+        sqlite3.DatabaseError: If the file cannot be opened or is not a SQLite database.
+    """
+    conn = _connect_readonly(db_path)
+    try:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not {"meta", "entries"} <= tables:
+            return None
+        row = conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def _kind(entry: WalkEntry) -> str:
+    if not entry.is_dir:
+        return FILE
+    return LINKED_DIRECTORY if entry.is_symlink else DIRECTORY
+
+
+def _join(parent: str, name: str) -> str:
+    return f"{parent}/{name}" if parent else name
+
+
+def _row(rel_path: str, parent: str | None, kind: str, st: os.stat_result) -> tuple:
+    size = st.st_size if kind == FILE else 0
+    return (rel_path, parent, kind, size, st.st_mtime_ns, st.st_ino)
+
+
+def write_snapshot(
+    db_path: str | os.PathLike,
+    root: str | os.PathLike,
+    *,
+    include_hidden: bool = True,
+    exclude: re.Pattern | None = None,
+    gitignore: GitIgnore | None = None,
+) -> int:
+    """
+    Record every file and folder under `root` in a fresh snapshot at `db_path`.
+
+    Returns:
+        int: Number of entries recorded, not counting the root itself.
+    """
+    root_str = os.path.abspath(os.fspath(root))
+    conn = _connect(db_path)
+    try:
+        conn.execute("DELETE FROM entries")
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('root', ?)", (root_str,))
+        conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", _row("", None, DIRECTORY, os.stat(root_str)))
+
+        count = 0
+        stack = [(root_str, "", gitignore)]
+        while stack:
+            dir_path, rel_dir, rules = stack.pop()
+            entries = scan_dir(dir_path, include_hidden=include_hidden, exclude=exclude, with_stat=True, gitignore=rules)
+            rows = []
+            for entry in entries:
+                kind = _kind(entry)
+                rel_path = _join(rel_dir, entry.name)
+                rows.append(_row(rel_path, rel_dir, kind, entry.stat))
+                if kind == DIRECTORY:
+                    child_rules = rules.for_directory(entry.path) if rules is not None else None
+                    stack.append((entry.path, rel_path, child_rules))
+            conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+            count += len(rows)
+
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+
+def diff_snapshot(
+    db_path: str | os.PathLike,
+    root: str | os.PathLike,
+    *,
+    include_hidden: bool = True,
+    exclude: re.Pattern | None = None,
+    gitignore: GitIgnore | None = None,
+) -> Iterator[SnapshotChange]:
+    """
+    Yield the differences between the snapshot at `db_path` and the tree at `root`.
+
+    Files are modified when their size, mtime or inode changed. Folders are
+    only reported as added or removed, together with everything inside them;
+    an entry that changed between file and folder is reported as removed and
+    added. Use the same filters that were used for the snapshot.
+
+    Raises:
+        ValueError: If the snapshot is missing or was taken of another directory.
+    """
+    root_str = os.path.abspath(os.fspath(root))
+    recorded_root = snapshot_root(db_path)
+    if recorded_root is None:
+        raise ValueError(f"not a dir_tree snapshot: {os.fspath(db_path)}")
+    if recorded_root != root_str:
+        raise ValueError(f"snapshot was taken of {recorded_root}, not {root_str}")
+    filters = _Filters(include_hidden, exclude)
+    conn = _connect_readonly(db_path)
+    try:
+        stack = [(root_str, "", gitignore)]
+        while stack:
+            dir_path, rel_dir, rules = stack.pop()
+            try:
+                dir_stat = os.stat(dir_path)
+            except OSError:
+                continue
+
+            recorded = {
+                rel_path: (kind, size, mtime_ns, inode)
+                for rel_path, kind, size, mtime_ns, inode in conn.execute(
+                    "SELECT path, kind, size, mtime_ns, inode FROM entries WHERE parent = ?", (rel_dir,)
+                )
+            }
+            row = conn.execute("SELECT mtime_ns FROM entries WHERE path = ? AND kind = ?", (rel_dir, DIRECTORY)).fetchone()
+
+            if row is not None and row[0] == dir_stat.st_mtime_ns:
+                # Same entries as when the snapshot was taken: stat them, don't list.
+                subdirs = []
+                for rel_path, (kind, size, mtime_ns, inode) in sorted(recorded.items()):
+                    abs_path = os.path.join(dir_path, rel_path.rpartition("/")[2])
+                    if kind == DIRECTORY:
+                        child_rules = rules.for_directory(abs_path) if rules is not None else None
+                        subdirs.append((abs_path, rel_path, child_rules))
+                    elif kind == FILE:
+                        try:
+                            st = os.stat(abs_path)
+                        except OSError:
+                            yield SnapshotChange("removed", rel_path, False, size, None)
+                            continue
+                        if (st.st_size, st.st_mtime_ns, st.st_ino) != (size, mtime_ns, inode):
+                            yield SnapshotChange("modified", rel_path, False, size, st.st_size)
+                stack.extend(reversed(subdirs))
+                continue
+
+            current = {
+                _join(rel_dir, entry.name): entry
+                for entry in scan_dir(dir_path, include_hidden=include_hidden, exclude=exclude, with_stat=True, gitignore=rules)
+            }
+            subdirs = []
+            for rel_path in sorted(recorded.keys() | current.keys()):
+                old = recorded.get(rel_path)
+                entry = current.get(rel_path)
+                kind = _kind(entry) if entry is not None else None
+
+                if old is not None and old[0] != kind:
+                    yield from _removed_tree(conn, rel_path, old)
+                    old = None
+                if entry is None:
+                    continue
+
+                child_rules = rules.for_directory(entry.path) if rules is not None and kind == DIRECTORY else None
+                if old is None:
+                    yield from _added_tree(entry, rel_path, kind, child_rules, filters)
+                elif kind == DIRECTORY:
+                    subdirs.append((entry.path, rel_path, child_rules))
+                elif kind == FILE:
+                    _, size, mtime_ns, inode = old
+                    st = entry.stat
+                    if (st.st_size, st.st_mtime_ns, st.st_ino) != (size, mtime_ns, inode):
+                        yield SnapshotChange("modified", rel_path, False, size, st.st_size)
+            stack.extend(reversed(subdirs))
+    finally:
+        conn.close()
+
+
+def _removed_tree(conn: sqlite3.Connection, rel_path: str, old: tuple) -> Iterator[SnapshotChange]:
+    """Yield a recorded entry that is gone, followed by everything recorded below it."""
+    kind, size = old[0], old[1]
+    yield SnapshotChange("removed", rel_path, kind != FILE, size if kind == FILE else None, None)
+    if kind != DIRECTORY:
+        return
+    # Everything from "<rel_path>/" up to "<rel_path>0" ("0" sorts right after "/"),
+    # a range the primary key index can seek to.
+    prefix = rel_path + "/"
+    for path, child_kind, child_size in conn.execute(
+        "SELECT path, kind, size FROM entries WHERE path >= ? AND path < ? ORDER BY path", (prefix, rel_path + "0")
+    ):
+        yield SnapshotChange("removed", path, child_kind != FILE, child_size if child_kind == FILE else None, None)
+
+
+def _added_tree(
+    entry: WalkEntry, rel_path: str, kind: str, rules: GitIgnore | None, filters: _Filters
+) -> Iterator[SnapshotChange]:
+    """Yield a new entry, followed by everything currently below it."""
+    if kind != DIRECTORY:
+        yield SnapshotChange("added", rel_path, kind != FILE, None, entry.stat.st_size if kind == FILE else None)
+        return
+
+    yield SnapshotChange("added", rel_path, True)
+    stack = [(entry.path, rel_path, rules)]
+    while stack:
+        dir_path, rel_dir, dir_rules = stack.pop()
+        children = scan_dir(
+            dir_path, include_hidden=filters.include_hidden, exclude=filters.exclude, with_stat=True, gitignore=dir_rules
+        )
+        subdirs = []
+        for child in sorted(children, key=lambda item: item.name):
+            child_kind = _kind(child)
+            child_rel = _join(rel_dir, child.name)
+            if child_kind == DIRECTORY:
+                child_rules = dir_rules.for_directory(child.path) if dir_rules is not None else None
+                subdirs.append((child.path, child_rel, child_rules))
+            yield SnapshotChange("added", child_rel, child_kind != FILE, None, child.stat.st_size if child_kind == FILE else None)
+        stack.extend(reversed(subdirs))
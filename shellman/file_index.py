@@ -0,0 +1,197 @@
+"""Shellman: persistent file-name index
+
+A locate-style SQLite database of the files under a directory, used by
+`find_files --build-index` / `--index` to answer name and extension queries
+without walking the tree.
+
+Every indexed directory is stored with its mtime. A refresh re-lists only
+directories whose mtime changed (a file was added, removed or renamed in
+them); unchanged directories keep their recorded files and are descended into
+via their recorded subdirectories. Size and mtime of a file modified in place
+are therefore only refreshed once its directory changes.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from shellman.walker import WalkEntry, scan_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS files_suffix ON files (suffix);
+"""
+
+
+class IndexStats(NamedTuple):
+    """Summary of an index build or refresh."""
+
+    root: str
+    files: int
+    dirs: int
+    rescanned: int
+
+
+def _connect(db_path: str | os.PathLike) -> sqlite3.Connection:
+    """Open an index for writing, creating its tables; refuse unrelated databases."""
+    conn = sqlite3.connect(os.fspath(db_path))
+    try:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if tables and "files" not in tables:
+            raise sqlite3.DatabaseError(f"not a find_files index: {os.fspath(db_path)}")
+        conn.executescript(SCHEMA)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def _connect_readonly(db_path: str | os.PathLike) -> sqlite3.Connection:
+    """Open an existing index without creating or modifying anything."""
+    uri = Path(os.path.abspath(os.fspath(db_path))).as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+def index_root(db_path: str | os.PathLike) -> str | None:
+    """
+    Return the directory an index was built for, or None if the file is not an index.
+
+    Raises:
+        sqlite3.DatabaseError: If the file cannot be opened or is not a SQLite database.
+    """
+    conn = _connect_readonly(db_path)
+    try:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not {"meta", "files"} <= tables:
+            return None
+        row = conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def build_index(db_path: str | os.PathLike, root: str | os.PathLike) -> IndexStats:
+    """
+    Create or incrementally refresh the index at `db_path` for `root`.
+
+    If the index was built for a different root it is rebuilt from scratch.
+    """
+    root_str = os.path.abspath(os.fspath(root))
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        if row is None or row[0] != root_str:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM dirs")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('root', ?)", (root_str,))
+
+        known_mtimes = dict(conn.execute("SELECT path, mtime_ns FROM dirs"))
+        seen: set[str] = set()
+        rescanned = 0
+        stack = [(root_str, None)]
+        while stack:
+            dir_path, parent = stack.pop()
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(dir_path)
+
+            if known_mtimes.get(dir_path) == mtime_ns:
+                stack.extend(
+                    (sub, dir_path) for (sub,) in conn.execute("SELECT path FROM dirs WHERE parent = ?", (dir_path,))
+                )
+                continue
+
+            rescanned += 1
+            entries = scan_dir(dir_path, with_stat=True)
+            conn.execute("DELETE FROM files WHERE dir = ?", (dir_path,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, name, suffix, size, mtime_ns) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (entry.path, dir_path, entry.name, entry.suffix, entry.stat.st_size, entry.stat.st_mtime_ns)
+                    for entry in entries
+                    if not entry.is_dir
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (dir_path, parent, mtime_ns),
+            )
+            stack.extend((entry.path, dir_path) for entry in entries if entry.is_dir and not entry.is_symlink)
+
+        vanished = [(path,) for path in known_mtimes if path not in seen]
+        conn.executemany("DELETE FROM files WHERE dir = ?", vanished)
+        conn.executemany("DELETE FROM dirs WHERE path = ?", vanished)
+        conn.commit()
+
+        file_count = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return IndexStats(root_str, file_count, len(seen), rescanned)
+    finally:
+        conn.close()
+
+
+def query_index(
+    db_path: str | os.PathLike,
+    *,
+    under: str | None = None,
+    name_fragment: str | None = None,
+    suffix: str | None = None,
+) -> Iterator[WalkEntry]:
+    """
+    Yield indexed files matching the filters.
+
+    Args:
+        db_path: Index database.
+        under: Only return files below this absolute directory.
+        name_fragment: Case-sensitive substring of the file name.
+        suffix: Exact extension, including the dot (e.g. ".py").
+
+    Yields:
+        WalkEntry: Files with `stat` filled from the recorded size and mtime.
+    """
+    clauses = []
+    params: list = []
+    if under:
+        prefix = under.rstrip(os.sep) + os.sep
+        # A range on the primary key, so SQLite seeks instead of scanning every row.
+        clauses.append("path >= ? AND path < ?")
+        params.extend([prefix, prefix[:-1] + chr(ord(os.sep) + 1)])
+    if name_fragment:
+        clauses.append("instr(name, ?) > 0")
+        params.append(name_fragment)
+    if suffix:
+        clauses.append("suffix = ?")
+        params.append(suffix)
+
+    sql = "SELECT path, name, size, mtime_ns FROM files"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    conn = _connect_readonly(db_path)
+    try:
+        for path, name, size, mtime_ns in conn.execute(sql, params):
+            mtime = mtime_ns / 1e9
+            stat = os.stat_result((0, 0, 0, 0, 0, 0, size, mtime, mtime, mtime))
+            yield WalkEntry(path, name, 0, False, False, stat)
+    finally:
+        conn.close()
@@ -0,0 +1,179 @@
+"""Shellman: .gitignore matching for tree walks
+
+Parses `.gitignore` files hierarchically so that the walker can prune ignored
+directories before entering them. Each file is compiled once into a list of
+regular expressions; a `GitIgnore` object holds the rules of one directory and
+a link to the rules inherited from its parents.
+
+Supported syntax follows gitignore(5): comments, `!` negation, trailing `/`
+for directories only, patterns anchored by a slash, `*`, `?`, `[...]` and
+`**`. The `.git` directory itself is always ignored.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import NamedTuple
+
+GITIGNORE_NAME = ".gitignore"
+
+
+class _Rule(NamedTuple):
+    """One compiled `.gitignore` line."""
+
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+def _translate(pattern: str) -> str:
+    """Translate the glob part of a gitignore pattern into a regex fragment."""
+    parts: list[str] = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            if pattern.startswith("**", i):
+                at_start = i == 0 or pattern[i - 1] == "/"
+                at_end = i + 2 == n or pattern[i + 2] == "/"
+                if at_start and at_end:
+                    if i + 2 == n:
+                        parts.append(".*")
+                        i += 2
+                    else:
+                        parts.append("(?:.*/)?")
+                        i += 3
+                    continue
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) or pattern.startswith("[^", i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif char == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+def parse_gitignore(lines: list[str]) -> list[_Rule]:
+    """Compile the lines of one `.gitignore` file into rules, in file order."""
+    rules: list[_Rule] = []
+    for raw in lines:
+        line = raw.rstrip("\n").rstrip("\r")
+        if not line or line.startswith("#"):
+            continue
+
+        # Trailing spaces are ignored unless escaped.
+        stripped = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+        if not line:
+            continue
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        anchored = "/" in line
+        line = line.lstrip("/")
+        body = _translate(line)
+        regex = f"^{body}$" if anchored else f"^(?:.*/)?{body}$"
+        rules.append(_Rule(re.compile(regex), negate, dir_only))
+    return rules
+
+
+def _read_rules(path: str) -> list[_Rule]:
+    """Compile the `.gitignore`-style file at `path`, or return no rules if it is unreadable."""
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return parse_gitignore(f.readlines())
+    except OSError:
+        return []
+
+
+class GitIgnore:
+    """The gitignore rules in effect for one directory."""
+
+    def __init__(self, base: str, rules: list[_Rule], parent: GitIgnore | None = None) -> None:
+        self.base = base
+        self._prefix = base if base.endswith(os.sep) else base + os.sep
+        self.rules = rules
+        self.parent = parent
+
+    @classmethod
+    def for_root(cls, root: str | os.PathLike) -> GitIgnore:
+        """
+        Build the rules in effect for `root`.
+
+        If `root` lies inside a git work tree, `.gitignore` files (and
+        `.git/info/exclude`) from the top of the work tree down to `root` are
+        loaded, so walking a subdirectory honours the repository's rules.
+        """
+        root_abs = os.path.abspath(os.fspath(root))
+        chain = [root_abs]
+        top = None
+        current = root_abs
+        while True:
+            if os.path.exists(os.path.join(current, ".git")):
+                top = current
+                break
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+            chain.append(current)
+
+        ignore = cls(root_abs, [])
+        if top is None:
+            return ignore.for_directory(root_abs)
+
+        ignore = cls(top, _read_rules(os.path.join(top, ".git", "info", "exclude")))
+        for directory in reversed(chain):
+            ignore = ignore.for_directory(directory)
+        return ignore
+
+    def for_directory(self, path: str) -> GitIgnore:
+        """Return the rules for `path`, adding its own `.gitignore` if it has one."""
+        rules = _read_rules(os.path.join(path or ".", GITIGNORE_NAME))
+        if not rules:
+            return self
+        return GitIgnore(os.path.abspath(path or "."), rules, self)
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """Return True if `path` is ignored; the deepest, last matching rule wins."""
+        if is_dir and os.path.basename(path) == ".git":
+            return True
+
+        abs_path = os.path.abspath(path)
+        node: GitIgnore | None = self
+        while node is not None:
+            if node.rules and abs_path.startswith(node._prefix):
+                relative = abs_path[len(node._prefix):].replace(os.sep, "/")
+                for rule in reversed(node.rules):
+                    if rule.dir_only and not is_dir:
+                        continue
+                    if rule.regex.match(relative):
+                        return not rule.negate
+            node = node.parent
+        return False
@@ -0,0 +1,39 @@
+"""Shellman: shared thread-pool helpers
+
+Per-file work in commands such as `checksum_files` and `file_stats` is I/O
+bound, so it is spread over a thread pool while results are still reported in
+the order the files were listed.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], jobs: int) -> Iterator[R]:
+    """
+    Apply `func` to `items` on a thread pool and yield results in input order.
+
+    At most `jobs * 4` tasks are in flight at once, so memory stays flat no
+    matter how many items are fed in. With `jobs == 1` the work runs inline.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    window = jobs * 4
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,250 @@
+"""Shellman: shared directory walker
+
+One traversal engine for every command that walks a directory tree
+(`file_stats`, `find_files`, `checksum_files`, `dir_tree`, `zip pack`).
+
+It is built on `os.scandir`, so the file type (and, where requested, the stat
+data) cached on each `DirEntry` is reused instead of calling `is_file()` or
+`stat()` again per path. Excluded and hidden directories are pruned before
+they are entered, and results are lightweight `WalkEntry` tuples of plain
+strings rather than `Path` objects.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+from shellman.gitignore import GitIgnore
+
+
+class WalkEntry(NamedTuple):
+    """A single file or directory found by the walker."""
+
+    path: str
+    name: str
+    depth: int
+    is_dir: bool
+    is_symlink: bool
+    stat: os.stat_result | None = None
+
+    @property
+    def suffix(self) -> str:
+        """Final extension of the name, following `pathlib.PurePath.suffix` rules."""
+        index = self.name.rfind(".")
+        if 0 < index < len(self.name) - 1:
+            return self.name[index:]
+        return ""
+
+
+def compile_excludes(patterns: Iterable[str]) -> re.Pattern | None:
+    """
+    Compile glob patterns into a single regular expression.
+
+    Returns None when there are no patterns, so callers can skip matching.
+    """
+    translated = [fnmatch.translate(os.path.normcase(pattern)) for pattern in patterns if pattern]
+    if not translated:
+        return None
+    return re.compile("|".join(f"(?:{item})" for item in translated))
+
+
+def is_excluded(name: str, path: str, exclude: re.Pattern | None) -> bool:
+    """Return True if the entry name or its full path matches the exclude regex."""
+    if exclude is None:
+        return False
+    return bool(exclude.match(os.path.normcase(name)) or exclude.match(os.path.normcase(path)))
+
+
+def scan_dir(
+    path: str,
+    *,
+    depth: int = 1,
+    include_hidden: bool = True,
+    exclude: re.Pattern | None = None,
+    with_stat: bool = False,
+    gitignore: GitIgnore | None = None,
+) -> list[WalkEntry]:
+    """
+    List one directory with filters applied.
+
+    `gitignore`, if given, must hold the rules in effect for `path` itself
+    (see `GitIgnore.for_directory`); ignored entries are dropped.
+
+    Unreadable directories yield an empty list. Only regular files and
+    directories (or symlinks to them) are listed; broken links, sockets and
+    other special files are skipped.
+    """
+    entries: list[WalkEntry] = []
+    try:
+        with os.scandir(path or ".") as it:
+            for entry in it:
+                name = entry.name
+                if not include_hidden and name.startswith("."):
+                    continue
+
+                entry_path = os.path.join(path, name)
+                if is_excluded(name, entry_path, exclude):
+                    continue
+
+                try:
+                    is_dir = entry.is_dir()
+                    if not is_dir and not entry.is_file():
+                        continue
+                    if gitignore is not None and gitignore.is_ignored(entry_path, is_dir):
+                        continue
+                    is_symlink = entry.is_symlink()
+                    stat = entry.stat() if with_stat else None
+                except OSError:
+                    continue
+
+                entries.append(WalkEntry(entry_path, name, depth, is_dir, is_symlink, stat))
+    except OSError:
+        return []
+
+    return entries
+
+
+def walk(
+    root: str | os.PathLike,
+    *,
+    include_dirs: bool = False,
+    include_hidden: bool = True,
+    exclude: re.Pattern | Iterable[str] | None = None,
+    max_depth: int | None = None,
+    with_stat: bool = False,
+    follow_symlinks: bool = False,
+    respect_gitignore: bool = False,
+    jobs: int = 1,
+) -> Iterator[WalkEntry]:
+    """
+    Walk a directory tree and yield its entries.
+
+    Paths are built the way `pathlib` builds them, so walking "." yields
+    "src/app.py" rather than "./src/app.py". Traversal uses an explicit stack,
+    so deep trees cannot hit the recursion limit; the order of entries is not
+    sorted.
+
+    Args:
+        root: Directory to walk.
+        include_dirs: Also yield directory entries, not just files.
+        include_hidden: Include names starting with "." (hidden directories
+            are pruned, not just hidden from the output).
+        exclude: Glob patterns (or a regex from `compile_excludes`) matched
+            against each name and path; matching directories are pruned.
+        max_depth: Deepest level to yield, where the root's children are at
+            depth 1. None means unlimited.
+        with_stat: Attach `os.stat_result` to every entry.
+        follow_symlinks: Descend into symlinked directories.
+        respect_gitignore: Skip entries ignored by `.gitignore` files (read
+            hierarchically, starting at the top of the enclosing git work
+            tree) and never enter ignored directories.
+        jobs: List up to this many directories concurrently. Worthwhile on
+            network filesystems, where each listing is a round trip; the
+            order of entries then varies between runs.
+
+    Yields:
+        WalkEntry: Files (and directories if requested). Symlinks to files
+        are reported as files, matching `Path.is_file()`.
+    """
+    if exclude is not None and not isinstance(exclude, re.Pattern):
+        exclude = compile_excludes(exclude)
+
+    root_str = os.fspath(root)
+    root_ignore = GitIgnore.for_root(root_str) if respect_gitignore else None
+    root_dir = "" if root_str == "." else root_str
+
+    if jobs > 1:
+        yield from _walk_parallel(
+            root_dir,
+            root_ignore,
+            jobs=jobs,
+            include_dirs=include_dirs,
+            include_hidden=include_hidden,
+            exclude=exclude,
+            max_depth=max_depth,
+            with_stat=with_stat,
+            follow_symlinks=follow_symlinks,
+        )
+        return
+
+    stack = [(root_dir, 1, root_ignore)]
+    while stack:
+        dir_path, depth, gitignore = stack.pop()
+        for entry in scan_dir(
+            dir_path,
+            depth=depth,
+            include_hidden=include_hidden,
+            exclude=exclude,
+            with_stat=with_stat,
+            gitignore=gitignore,
+        ):
+            if entry.is_dir:
+                if include_dirs:
+                    yield entry
+                if (follow_symlinks or not entry.is_symlink) and (max_depth is None or depth < max_depth):
+                    child_ignore = gitignore.for_directory(entry.path) if gitignore is not None else None
+                    stack.append((entry.path, depth + 1, child_ignore))
+            else:
+                yield entry
+
+
+def _walk_parallel(
+    root_dir: str,
+    root_ignore: GitIgnore | None,
+    *,
+    jobs: int,
+    include_dirs: bool,
+    include_hidden: bool,
+    exclude: re.Pattern | None,
+    max_depth: int | None,
+    with_stat: bool,
+    follow_symlinks: bool,
+) -> Iterator[WalkEntry]:
+    """
+    `walk` with directories listed on a thread pool.
+
+    Subdirectories wait in a stack and at most `jobs * 4` listings are
+    submitted or finished-but-unread at a time; the pool is topped up as the
+    caller consumes listings, so a slow consumer or a folder with a huge
+    number of subfolders does not pile up listings in memory. Entries are
+    yielded as each listing completes; pending listings are cancelled if the
+    caller stops early.
+    """
+    def scan(dir_path: str, depth: int, gitignore: GitIgnore | None):
+        entries = scan_dir(
+            dir_path,
+            depth=depth,
+            include_hidden=include_hidden,
+            exclude=exclude,
+            with_stat=with_stat,
+            gitignore=gitignore,
+        )
+        subdirs = [
+            (entry.path, depth + 1, gitignore.for_directory(entry.path) if gitignore is not None else None)
+            for entry in entries
+            if entry.is_dir and (follow_symlinks or not entry.is_symlink) and (max_depth is None or depth < max_depth)
+        ]
+        return entries, subdirs
+
+    window = jobs * 4
+    waiting = [(root_dir, 1, root_ignore)]
+    pending: set = set()
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        while waiting or pending:
+            while waiting and len(pending) < window:
+                pending.add(pool.submit(scan, *waiting.pop()))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entries, subdirs = future.result()
+                waiting.extend(subdirs)
+                for entry in entries:
+                    if include_dirs or not entry.is_dir:
+                        yield entry
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)